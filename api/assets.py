@@ -0,0 +1,243 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, abort, current_app, request, send_file, url_for
+
+from api.log import log_fields
+
+try:
+    # Optional, smaller than gzip for JS, gzip variants are always built
+    import brotli
+except ImportError:
+    brotli = None
+
+
+#Static asset pipeline
+#   Build (python -m api.assets): copies every file of static/ to static/dist/ under a content-hashed name
+#       car.js -> car.3f2a9c01d4.js, plus car.3f2a9c01d4.js.gz (and .br when brotli is installed)
+#       References between assets are rewritten in the copies before hashing:
+#           JS module imports       './scene.js'          -> './scene.<hash>.js'
+#           absolute static paths   '/static/FL.glb'      -> '/static/dist/FL.<hash>.glb'
+#       so a changed GLB also changes the name of the JS that loads it
+#       static/dist/manifest.json maps source name -> built name, and records the sha256 of every source
+#       A manifest whose sources changed (or disappeared) since the build is ignored as a whole:
+#       an unchanged module still imports the stale build of a changed one
+#   Serve: /static/dist/<name> picks the .br / .gz variant the browser accepts (Content-Encoding, Vary)
+#       and marks it immutable for a year: a new build has new names, the old ones are never revalidated
+#   Templates call asset_url("car.js"): the built name when the manifest exists and the app is not in debug,
+#   else the plain /static/ file, so development never serves stale builds
+STATIC_DIR = "static"
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+HASH_LENGTH = 10
+# Compressing these gains nothing
+PRECOMPRESSED_SKIP = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff2", ".br", ".gz")
+MIN_COMPRESS_SIZE = 512
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("text/javascript", ".js")
+
+JS_IMPORT = re.compile(r"""((?:\bfrom|\bimport)\s*\(?\s*)(['"])\./([\w.-]+\.js)\2""")
+STATIC_PATH = re.compile(r"""(['"])/static/([\w.-]+)\1""")
+
+assets_bp = Blueprint("assets", __name__)
+logger = logging.getLogger(__name__)
+
+
+def hashed_name(name, content: bytes):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def js_imports(source: str):
+    return [match.group(3) for match in JS_IMPORT.finditer(source)]
+
+
+def rewrite_references(source: str, manifest: dict, dist_url: str) -> str:
+    def module(match):
+        built = manifest.get(match.group(3))
+        return f"{match.group(1)}{match.group(2)}./{built}{match.group(2)}" if built else match.group(0)
+
+    def static_path(match):
+        built = manifest.get(match.group(2))
+        return f"{match.group(1)}{dist_url}/{built}{match.group(1)}" if built else match.group(0)
+
+    return STATIC_PATH.sub(static_path, JS_IMPORT.sub(module, source))
+
+
+def write_variants(path, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+    sizes = {"raw": len(content)}
+    if path.endswith(PRECOMPRESSED_SKIP) or len(content) < MIN_COMPRESS_SIZE:
+        return sizes
+    # mtime=0: the same input always gives the same .gz
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(compressed) < len(content):
+        with open(path + ".gz", "wb") as f:
+            f.write(compressed)
+        sizes["gzip"] = len(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            with open(path + ".br", "wb") as f:
+                f.write(compressed)
+            sizes["br"] = len(compressed)
+    return sizes
+
+
+def build(static_dir=STATIC_DIR, dist_url="/static/dist"):
+    """
+    Build static_dir/dist from the files of static_dir.
+
+    Returns:
+        dict: source name -> {"name": built name, "raw"/"gzip"/"br": sizes}
+
+    Raises:
+        ValueError: JS modules import each other in a cycle
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    os.makedirs(dist_dir, exist_ok=True)
+    for name in os.listdir(dist_dir):
+        os.remove(os.path.join(dist_dir, name))
+
+    sources = sorted(name for name in os.listdir(static_dir)
+                     if os.path.isfile(os.path.join(static_dir, name)) and not name.startswith("."))
+    contents = {}
+    for name in sources:
+        with open(os.path.join(static_dir, name), "rb") as f:
+            contents[name] = f.read()
+
+    manifest = {}
+    report = {}
+    sources = {name: hashlib.sha256(content).hexdigest() for name, content in contents.items()}
+
+    def emit(name, content):
+        manifest[name] = hashed_name(name, content)
+        report[name] = dict(name=manifest[name], **write_variants(os.path.join(dist_dir, manifest[name]), content))
+
+    # Assets that reference nothing first, then JS modules after the modules they import
+    scripts = [name for name in sources if name.endswith(".js")]
+    for name in sources:
+        if name not in scripts:
+            emit(name, contents[name])
+
+    visiting = set()
+
+    def emit_script(name):
+        if name in manifest:
+            return
+        if name in visiting:
+            raise ValueError(f"Import cycle through {name}")
+        visiting.add(name)
+        source = contents[name].decode("utf-8")
+        for dependency in js_imports(source):
+            if dependency in contents:
+                emit_script(dependency)
+        visiting.discard(name)
+        emit(name, rewrite_references(source, manifest, dist_url).encode("utf-8"))
+
+    for name in scripts:
+        emit_script(name)
+
+    with open(os.path.join(dist_dir, MANIFEST), "w") as f:
+        json.dump({"assets": manifest, "sources": sources}, f, indent=2, sort_keys=True)
+    return report
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """
+    Returns:
+        dict: source name -> built name, {} when there is no build or it does not match the sources
+    """
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST)) as f:
+            manifest = json.load(f)
+        assets, sources = manifest["assets"], manifest["sources"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+    for name, digest in sources.items():
+        try:
+            with open(os.path.join(static_dir, name), "rb") as f:
+                current = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            current = None
+        if current != digest:
+            logger.warning("Stale static/dist build, serving /static until python -m api.assets runs again",
+                           extra=log_fields(changed=name))
+            return {}
+    return assets
+
+
+def accepted_encodings():
+    # "gzip, deflate, br;q=0.8" -> {"gzip", "deflate", "br"}, q=0 means refused
+    accepted = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+@assets_bp.route("/static/dist/<path:filename>")
+def serve_asset(filename):
+    dist_dir = os.path.join(current_app.root_path, STATIC_DIR, DIST_DIR)
+    path = os.path.realpath(os.path.join(dist_dir, filename))
+    if not path.startswith(os.path.realpath(dist_dir) + os.sep) or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    accepted = accepted_encodings()
+    encoding = None
+    for coding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if coding in accepted and os.path.isfile(path + suffix):
+            encoding, path = coding, path + suffix
+            break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=None)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = IMMUTABLE if filename != MANIFEST else "no-cache"
+    return response
+
+
+def init_app(app):
+    # /static/dist/ serving and asset_url() in templates
+    manifest = load_manifest(os.path.join(app.root_path, STATIC_DIR))
+    app.register_blueprint(assets_bp)
+
+    def asset_url(name):
+        if manifest and not current_app.debug and name in manifest:
+            return url_for("assets.serve_asset", filename=manifest[name])
+        return url_for("static", filename=name)
+
+    app.context_processor(lambda: {"asset_url": asset_url})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets into static/dist")
+    parser.add_argument("--static", default=STATIC_DIR, help="Static directory")
+    args = parser.parse_args()
+
+    report = build(args.static)
+    total = {"raw": 0, "gzip": 0, "br": 0}
+    for name, entry in report.items():
+        best = min(entry.get("br", entry["raw"]), entry.get("gzip", entry["raw"]))
+        total["raw"] += entry["raw"]
+        total["gzip"] += entry.get("gzip", entry["raw"])
+        total["br"] += entry.get("br", entry.get("gzip", entry["raw"]))
+        print(f"{name:<40} -> {entry['name']:<50} {entry['raw']:>9} B  best {best:>9} B")
+    print(f"Total {total['raw']} B, gzip {total['gzip']} B" + (f", br {total['br']} B" if brotli else " (brotli not installed)"))
+
+
+if __name__ == "__main__":
+    main()
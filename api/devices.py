@@ -0,0 +1,78 @@
+import threading
+import time
+
+from api.filters import make_ranging_filter
+from api.history import RangingHistory
+from api.state import StateStore
+from api.tracker import TrajectoryTracker
+
+
+#Per-device state registry
+#   Every HPC frame carries Device_ID (phone key, fob, ...), 0xFF when the HPC does not know it
+#   Each device owns its state store, trajectory tracker, ranging filter, ranging history and timestamps
+#   Locks are sharded per device: ingest for one key never waits for another key
+#   The registry lock is only taken when a new Device_ID shows up
+UNKNOWN_DEVICE_ID = 0xFF
+
+
+class DeviceEntry:
+    def __init__(self, device_id, initial: dict):
+        self.device_id = device_id
+        # Serializes ingest of this device only
+        self.lock = threading.Lock()
+        self.store = StateStore(dict(initial, Device_ID=device_id))
+        # Last frame built by the ingest pipeline, compared with the next one for events
+        self.last_frame = self.store.snapshot().data
+        # Recent positions, heading and speed
+        self.trajectory = TrajectoryTracker()
+        # Every ranging sample with its resulting User position
+        self.history = RangingHistory()
+        # Smoothing of AOA/Distance, None when RANGING_FILTER_CONFIG["type"] is "none"
+        self.ranging_filter = make_ranging_filter()
+        self.first_seen = time.time()
+        self.last_seen = None
+        # time.monotonic() of the last frame received, for the inter-arrival metric
+        self.last_arrival = None
+        self.frames = 0
+
+    def describe(self, with_state=True):
+        snapshot = self.store.snapshot()
+        info = {
+            "Device_ID": self.device_id,
+            "version": snapshot.version,
+            "frames": self.frames,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "speed": self.trajectory.speed,
+            "history": len(self.history),
+        }
+        if with_state:
+            info["state"] = snapshot.data
+        return info
+
+
+class DeviceRegistry:
+    def __init__(self, initial: dict):
+        self.initial = initial
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def get(self, device_id):
+        return self._devices.get(device_id)
+
+    def get_or_create(self, device_id) -> DeviceEntry:
+        device = self._devices.get(device_id)
+        if device is None:
+            with self._lock:
+                device = self._devices.get(device_id)
+                if device is None:
+                    device = DeviceEntry(device_id, self.initial)
+                    # Replace the dict so lock-free readers never iterate a dict being resized
+                    self._devices = {**self._devices, device_id: device}
+        return device
+
+    def devices(self):
+        return sorted(self._devices.values(), key=lambda device: device.device_id)
+
+    def __len__(self):
+        return len(self._devices)
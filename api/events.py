@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+
+
+#Discrete transitions of the HPC frames (GET /api/events)
+#   build_ui_frame compares every frame with the previous frame of its device, field by field
+#   Connection and Door changes become events, e.g. "FrontLeft opened", "Ble Connected"
+#   Ranging / User move on every frame, they are state, not events
+#   The log is bounded: the oldest events are dropped, every event keeps its increasing id
+#   Readers ask for the events after the last id they saw, and can wait for the next one (long poll)
+EVENT_SECTIONS = ("Connection", "Door")
+EVENT_LOG_CAPACITY = 1024
+MAX_WAIT_SECS = 30.0
+
+DOOR_POSITION_EVENTS = {"open": "opened", "close": "closed"}
+DOOR_LOCK_EVENTS = {"lock": "locked", "unlock": "unlocked"}
+
+
+def changed_fields(previous: dict, frame: dict, sections=EVENT_SECTIONS) -> dict:
+    # -> {section: [field, ...]} for the sections that changed, {} for an identical frame
+    changes = {}
+    for section in sections:
+        old, new = previous[section], frame[section]
+        if old is new or old == new:
+            continue
+        changes[section] = [field for field in new if old.get(field) != new[field]]
+    return changes
+
+
+def transition_events(previous: dict, frame: dict, timestamp, device_id) -> list:
+    events = []
+
+    def add(section, field, old, new, message):
+        events.append({"timestamp": timestamp, "Device_ID": device_id, "section": section,
+                       "field": field, "from": old, "to": new, "message": message})
+
+    for section, fields in changed_fields(previous, frame).items():
+        for field in fields:
+            old, new = previous[section].get(field), frame[section][field]
+            if section == "Connection":
+                # "BleStatus" -> "Ble Connected"
+                add(section, field, old, new, f"{field.removesuffix('Status')} {new}")
+                continue
+            old_position, old_lock = old if old else (None, None)
+            position, lock = new
+            if position != old_position:
+                add(section, field, old, new, f"{field} {DOOR_POSITION_EVENTS.get(position, position)}")
+            if lock != old_lock:
+                add(section, field, old, new, f"{field} {DOOR_LOCK_EVENTS.get(lock, lock)}")
+    return events
+
+
+class EventLog:
+    def __init__(self, capacity=EVENT_LOG_CAPACITY):
+        self._events = deque(maxlen=capacity)
+        self._last_id = 0
+        self._appended = threading.Condition()
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def first_id(self):
+        # Oldest id still in the log, last_id + 1 when empty
+        events = self._events
+        return events[0]["id"] if events else self._last_id + 1
+
+    def extend(self, events):
+        if not events:
+            return
+        with self._appended:
+            for event in events:
+                self._last_id += 1
+                event["id"] = self._last_id
+                self._events.append(event)
+            self._appended.notify_all()
+
+    def since(self, event_id=0, limit=None, wait=0.0) -> list:
+        """
+        Events with an id above event_id, oldest first.
+
+        Args:
+            limit: Keep the first limit events, every event when None
+            wait: Secs to wait for a new event when there is none yet (at most MAX_WAIT_SECS)
+        """
+        with self._appended:
+            if wait > 0 and self._last_id <= event_id:
+                self._appended.wait_for(lambda: self._last_id > event_id, min(wait, MAX_WAIT_SECS))
+            events = []
+            # Newest first until event_id, the log is ordered by id
+            for event in reversed(self._events):
+                if event["id"] <= event_id:
+                    break
+                events.append(event)
+        events.reverse()
+        return events[:limit] if limit is not None else events
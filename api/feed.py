@@ -0,0 +1,132 @@
+import json
+
+from api.frame_codec import BLE_STATUS, DOORS, UWB_STATUS, VEHICLE_STATUS, encode_connection, encode_doors
+from api.stream import DEVICE_TOPIC, KEEPALIVE_SECS, TOPICS, event_payload
+
+
+#Compact delta feed for browser clients (GET /api/feed, Server-Sent Events, decoded by static/feed.js)
+#   The live frame is flattened to one list of FEED_FIELDS values:
+#       statuses as enum codes, the 5 doors as the 10-bit mask of api/frame_codec.py, floats rounded
+#   First event of a connection, a keyframe with everything needed to decode the rest:
+#       {"k":{"fields":[...],"enums":{...},"doors":[...]},"v":version,"s":[value, ...]}
+#   Then only what changed since the last event sent to this client, as index/value pairs:
+#       {"v":version,"d":[7,12.5,8,-40.25,9,1.5708]}
+#   Each connection diffs against what it was sent last, not against the previous version:
+#       a slow client gets one delta covering every frame it missed, never a gap
+#   Except discrete transitions: every Connection / Door publish queued for a slow client gets its own delta,
+#   without "v" (it lies between two versions), so a door opened and closed meanwhile is still seen open
+FEED_FIELDS = ("VehicleStatus", "BleStatus", "UwbStatus", "Door",
+               "FirstPathPower", "AOA", "Distance", "x", "y", "TurnAngle", "Device_ID")
+# Field -> digits kept, fewer digits = fewer bytes per delta
+FEED_PRECISION = {"FirstPathPower": 1, "AOA": 2, "Distance": 1, "x": 1, "y": 1, "TurnAngle": 3}
+
+KEYFRAME_HEADER = {
+    "fields": FEED_FIELDS,
+    "enums": {"VehicleStatus": VEHICLE_STATUS, "BleStatus": BLE_STATUS, "UwbStatus": UWB_STATUS},
+    "doors": DOORS,
+}
+
+# (version, values) of the last snapshot flattened, shared by every connection
+_last_values = (None, None)
+
+
+def _round(value, digits):
+    value = round(float(value), digits)
+    # 12.0 -> 12, one byte per integral value
+    return int(value) if value.is_integer() else value
+
+
+def feed_values(snapshot) -> list:
+    global _last_values
+    version, values = _last_values
+    if version == snapshot.version:
+        return values
+
+    data = snapshot.data
+    ranging, user = data["Ranging"], data["User"]
+    values = [
+        *encode_connection(data["Connection"]),
+        encode_doors(data["Door"]),
+        _round(ranging["FirstPathPower"], FEED_PRECISION["FirstPathPower"]),
+        _round(ranging["AOA"], FEED_PRECISION["AOA"]),
+        _round(ranging["Distance"], FEED_PRECISION["Distance"]),
+        _round(user["x"], FEED_PRECISION["x"]),
+        _round(user["y"], FEED_PRECISION["y"]),
+        _round(user["TurnAngle"], FEED_PRECISION["TurnAngle"]),
+        data.get("Device_ID", 0xFF),
+    ]
+    _last_values = (snapshot.version, values)
+    return values
+
+
+def _event(body) -> bytes:
+    return b"data: %s\n\n" % json.dumps(body, separators=(",", ":")).encode()
+
+
+def keyframe_event(version, values) -> bytes:
+    return _event({"k": KEYFRAME_HEADER, "v": version, "s": values})
+
+
+def delta_event(version, previous, values):
+    # None when nothing visible changed (e.g. a difference below FEED_PRECISION)
+    delta = []
+    for index, (old, new) in enumerate(zip(previous, values)):
+        if old != new:
+            delta += (index, new)
+    if not delta:
+        return None
+    if version is None:
+        # Transition delta, between two versions
+        return _event({"d": delta})
+    return _event({"v": version, "d": delta})
+
+
+# Sections published to the hub whose every change is sent, and their slice of FEED_FIELDS
+TRANSITION_TOPICS = {"Connection": slice(0, 3), "Door": slice(3, 4)}
+
+
+def transition_values(values, topic, event) -> list:
+    # values with the Connection / Door section of one queued hub event
+    section = json.loads(event_payload(event))
+    encoded = encode_connection(section) if topic == "Connection" else (encode_doors(section),)
+    values = list(values)
+    values[TRANSITION_TOPICS[topic]] = encoded
+    return values
+
+
+def feed_stream(hub, store, keepalive=KEEPALIVE_SECS):
+    """
+    Generator of the feed events of one connection.
+
+    Args:
+        hub: StreamHub, wakes the connection up and queues the Connection / Door publishes
+        store: StateStore (or SharedStateStore) holding the live frame
+    """
+    sub = hub.subscribe(TOPICS + (DEVICE_TOPIC,))
+    try:
+        # The replayed state is not newer than the keyframe
+        sub.get(timeout=0)
+        snapshot = store.snapshot()
+        sent = feed_values(snapshot)
+        yield keyframe_event(snapshot.version, sent)
+        while True:
+            frames = sub.get(timeout=keepalive)
+            if not frames:
+                yield b": keepalive\n\n"
+                continue
+            for topic, event in frames:
+                if topic in TRANSITION_TOPICS:
+                    values = transition_values(sent, topic, event)
+                    delta = delta_event(None, sent, values)
+                    if delta is not None:
+                        sent = values
+                        yield delta
+            # Ranging / User: whatever was published meanwhile, the client only needs the latest frame
+            snapshot = store.snapshot()
+            values = feed_values(snapshot)
+            event = delta_event(snapshot.version, sent, values)
+            if event is not None:
+                sent = values
+                yield event
+    finally:
+        hub.unsubscribe(sub)
@@ -0,0 +1,211 @@
+import math
+from collections import deque
+
+
+#Ranging filter stage
+#   Raw AOA/Distance of a single UWB sample is noisy: the avatar jumps and spins on every frame
+#   Each device runs its samples through:
+#       1. Median gate   : a Distance far from the median of the last samples is an outlier, skip it
+#       2. Confidence    : FirstPathPower maps to [min_confidence, 1], weak signal = less trust in the sample
+#       3. Tracker       : constant-velocity alpha-beta or Kalman filter on (x, y)
+#   Output is the smoothed position, velocity (cm/s) and heading (rad, same convention as TurnAngle)
+#
+#   Plain float math per axis: one sample of one device is a few dozen float operations,
+#   numpy call overhead on 2-element arrays would cost more than the math itself
+RANGING_FILTER_CONFIG = {
+    "type": "kalman",           # none, alpha_beta, kalman
+    # Median gate
+    "gate_window": 5,           # samples
+    "gate_distance": 150.0,     # cm away from the median to reject a sample
+    "gate_max_rejects": 3,      # consecutive rejects before the gate accepts the new range (user really moved)
+    # FirstPathPower confidence
+    "fpp_weak": -80.0,          # dbm, confidence = min_confidence
+    "fpp_strong": -30.0,        # dbm, confidence = 1
+    "min_confidence": 0.2,
+    # alpha-beta
+    "alpha": 0.5,
+    "beta": 0.1,
+    # Kalman
+    "process_noise": 2000.0,    # (cm/s^2)^2, acceleration variance
+    "measurement_noise": 400.0, # cm^2, position variance at full confidence
+    # Heading
+    "min_speed": 5.0,           # cm/s, below it the heading is kept
+    "max_dt": 2.0,              # secs, longer gaps restart the tracker
+}
+
+
+def fpp_confidence(first_path_power, config=RANGING_FILTER_CONFIG):
+    span = config["fpp_strong"] - config["fpp_weak"]
+    confidence = (first_path_power - config["fpp_weak"]) / span
+    return min(1.0, max(config["min_confidence"], confidence))
+
+
+class MedianGate:
+    def __init__(self, window=5, max_distance=150.0, max_rejects=3):
+        self.samples = deque(maxlen=window)
+        self.max_distance = max_distance
+        self.max_rejects = max_rejects
+        self.rejects = 0
+
+    def median(self):
+        ordered = sorted(self.samples)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def accept(self, distance):
+        if len(self.samples) >= 3:
+            if abs(distance - self.median()) > self.max_distance:
+                if self.rejects < self.max_rejects:
+                    self.rejects += 1
+                    return False
+                # The spike persisted: the user did move, restart the window from here
+                self.samples.clear()
+        self.rejects = 0
+        self.samples.append(distance)
+        return True
+
+    def reset(self):
+        self.samples.clear()
+        self.rejects = 0
+
+
+class AlphaBetaTracker:
+    def __init__(self, alpha=0.5, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+        # (x, y) cm and (vx, vy) cm/s, None before the first sample
+        self.position = None
+        self.velocity = None
+
+    def predict(self, dt):
+        (x, y), (vx, vy) = self.position, self.velocity
+        self.position = (x + vx * dt, y + vy * dt)
+
+    def update(self, mx, my, dt, confidence=1.0):
+        if self.position is None:
+            self.position = (float(mx), float(my))
+            self.velocity = (0.0, 0.0)
+            return
+        self.predict(dt)
+        (x, y), (vx, vy) = self.position, self.velocity
+        rx, ry = mx - x, my - y
+        gain = self.alpha * confidence
+        self.position = (x + gain * rx, y + gain * ry)
+        if dt > 0:
+            gain = self.beta * confidence / dt
+            self.velocity = (vx + gain * rx, vy + gain * ry)
+
+    def reset(self):
+        self.position = None
+        self.velocity = None
+
+
+class KalmanTracker:
+    # Constant-velocity model, one independent [position, velocity] state per axis
+    # Both axes see the same dt and noise, so they share one symmetric 2x2 covariance: p00, p01, p11
+    def __init__(self, process_noise=2000.0, measurement_noise=400.0):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.position = None
+        self.velocity = None
+        self.p00 = self.p01 = self.p11 = None
+
+    def predict(self, dt):
+        q = self.q
+        (x, y), (vx, vy) = self.position, self.velocity
+        self.position = (x + vx * dt, y + vy * dt)
+        self.p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 4 / 4
+        self.p01 = self.p01 + dt * self.p11 + q * dt ** 3 / 2
+        self.p11 = self.p11 + q * dt ** 2
+
+    def update(self, mx, my, dt, confidence=1.0):
+        if self.position is None:
+            self.position = (float(mx), float(my))
+            self.velocity = (0.0, 0.0)
+            self.p00, self.p01, self.p11 = self.r, 0.0, self.q
+            return
+        self.predict(dt)
+        # Weak first path -> larger measurement noise -> smaller gain
+        s = self.p00 + self.r / confidence
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        (x, y), (vx, vy) = self.position, self.velocity
+        rx, ry = mx - x, my - y
+        self.position = (x + k0 * rx, y + k0 * ry)
+        self.velocity = (vx + k1 * rx, vy + k1 * ry)
+        self.p11 = self.p11 - k1 * self.p01
+        self.p01 = (1 - k0) * self.p01
+        self.p00 = (1 - k0) * self.p00
+
+    def reset(self):
+        self.position = None
+        self.velocity = None
+        self.p00 = self.p01 = self.p11 = None
+
+
+class RangingFilter:
+    def __init__(self, config=RANGING_FILTER_CONFIG):
+        self.config = config
+        self.gate = MedianGate(config["gate_window"], config["gate_distance"], config["gate_max_rejects"])
+        if config["type"] == "alpha_beta":
+            self.tracker = AlphaBetaTracker(config["alpha"], config["beta"])
+        elif config["type"] == "kalman":
+            self.tracker = KalmanTracker(config["process_noise"], config["measurement_noise"])
+        else:
+            raise ValueError(f"Unknown ranging filter type: {config['type']}")
+        self.last_time = None
+        self.heading = None
+
+    def update(self, x, y, distance, first_path_power, timestamp):
+        """
+        Feed one ranging sample.
+
+        Args:
+            x, y: Raw position from get_xy (cm)
+            distance: Raw Distance (cm), used by the median gate
+            first_path_power: FirstPathPower (dbm)
+            timestamp: Sample time (secs)
+
+        Returns:
+            dict: {"x", "y", "vx", "vy", "TurnAngle"} or None when the sample was rejected before any estimate
+                  or is not finite (the state is left untouched, one NaN would poison every later estimate)
+        """
+        if not (math.isfinite(x) and math.isfinite(y) and math.isfinite(distance)
+                and math.isfinite(first_path_power) and math.isfinite(timestamp)):
+            return None
+        dt = 0.0 if self.last_time is None else max(0.0, timestamp - self.last_time)
+        if dt > self.config["max_dt"]:
+            self.reset()
+            dt = 0.0
+
+        if self.gate.accept(distance):
+            self.tracker.update(x, y, dt, fpp_confidence(first_path_power, self.config))
+        elif self.tracker.position is not None:
+            self.tracker.predict(dt)
+        else:
+            return None
+        self.last_time = timestamp
+
+        fx, fy = self.tracker.position
+        vx, vy = self.tracker.velocity
+        if self.heading is None:
+            # First sample: face (0,0) like TrajectoryTracker does
+            self.heading = math.atan2(fy, fx) - math.pi
+        elif math.hypot(vx, vy) >= self.config["min_speed"]:
+            self.heading = math.atan2(vy, vx)
+
+        return {"x": fx, "y": fy, "vx": vx, "vy": vy, "TurnAngle": self.heading}
+
+    def reset(self):
+        self.gate.reset()
+        self.tracker.reset()
+        self.last_time = None
+        self.heading = None
+
+
+def make_ranging_filter(config=RANGING_FILTER_CONFIG):
+    if config["type"] == "none":
+        return None
+    return RangingFilter(config)
@@ -0,0 +1,147 @@
+import struct
+
+import numpy as np
+
+
+#Fixed binary layout of one HPC frame
+#   Statuses are enum codes, the 5 doors are a 10-bit mask, ranging values are float32
+#   Record (little-endian, packed, 28 bytes):
+#       timestamp       float64   secs
+#       Device_ID       uint16
+#       VehicleStatus   uint8     index in VEHICLE_STATUS
+#       BleStatus       uint8     index in BLE_STATUS
+#       UwbStatus       uint8     index in UWB_STATUS
+#       Door            uint16    bit 2*i   : DOORS[i] open
+#                                 bit 2*i+1 : DOORS[i] unlock
+#       Flags           uint8     bit 0     : Ranging present
+#       FirstPathPower  float32   dbm
+#       AOA             float32   degree
+#       Distance        float32   cm
+#   Status strings are matched case-insensitively ("na" -> "NA"), UNKNOWN_CODE when not listed
+#   POST /api with Content-Type FRAME_CONTENT_TYPE carries one record instead of the JSON hpc_data_dict
+VEHICLE_STATUS = ("Sleep", "Awake")
+BLE_STATUS = ("Disconnected", "Connected")
+UWB_STATUS = ("NA", "Ranging", "CPD", "Mixed")
+DOORS = ("FrontLeft", "FrontRight", "RearLeft", "RearRight", "Trunk")
+UNKNOWN_CODE = 0xFF
+UNKNOWN_STATUS = "Unknown"
+
+FLAG_RANGING = 0x01
+
+FRAME_CONTENT_TYPE = "application/x-hpc-frame"
+
+FRAME_STRUCT = struct.Struct("<dHBBBHBfff")
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("Device_ID", "<u2"),
+    ("VehicleStatus", "u1"),
+    ("BleStatus", "u1"),
+    ("UwbStatus", "u1"),
+    ("Door", "<u2"),
+    ("Flags", "u1"),
+    ("FirstPathPower", "<f4"),
+    ("AOA", "<f4"),
+    ("Distance", "<f4"),
+])
+assert FRAME_DTYPE.itemsize == FRAME_STRUCT.size
+
+
+def _codes(values):
+    return {value.lower(): code for code, value in enumerate(values)}
+
+_VEHICLE_CODES = _codes(VEHICLE_STATUS)
+_BLE_CODES = _codes(BLE_STATUS)
+_UWB_CODES = _codes(UWB_STATUS)
+
+
+def status_code(codes, value):
+    return codes.get(str(value).lower(), UNKNOWN_CODE)
+
+
+def status_name(values, code):
+    return values[code] if code < len(values) else UNKNOWN_STATUS
+
+
+def encode_connection(connection: dict):
+    # -> (VehicleStatus, BleStatus, UwbStatus) codes
+    return (status_code(_VEHICLE_CODES, connection["VehicleStatus"]),
+            status_code(_BLE_CODES, connection["BleStatus"]),
+            status_code(_UWB_CODES, connection["UwbStatus"]))
+
+
+def decode_connection(vehicle, ble, uwb) -> dict:
+    return {
+        "VehicleStatus": status_name(VEHICLE_STATUS, vehicle),
+        "BleStatus": status_name(BLE_STATUS, ble),
+        "UwbStatus": status_name(UWB_STATUS, uwb),
+    }
+
+
+def encode_doors(door: dict) -> int:
+    bits = 0
+    for i, name in enumerate(DOORS):
+        position, lock = door[name]
+        if position == "open":
+            bits |= 1 << (2 * i)
+        if lock == "unlock":
+            bits |= 1 << (2 * i + 1)
+    return bits
+
+
+def decode_doors(bits: int) -> dict:
+    return {name: ["open" if bits >> (2 * i) & 1 else "close",
+                   "unlock" if bits >> (2 * i + 1) & 1 else "lock"]
+            for i, name in enumerate(DOORS)}
+
+
+def encode_frame(hpc_data_dict: dict, timestamp=0.0) -> bytes:
+    """
+    Pack one hpc_data_dict.
+
+    Raises:
+        KeyError, TypeError, ValueError: Frame does not match hpc_data_dict
+    """
+    ranging = hpc_data_dict.get("Ranging")
+    flags = 0
+    if ranging:
+        flags |= FLAG_RANGING
+        first_path_power, aoa, distance = ranging["FirstPathPower"], ranging["AOA"], ranging["Distance"]
+    else:
+        first_path_power = aoa = distance = 0.0
+    return FRAME_STRUCT.pack(
+        timestamp,
+        hpc_data_dict.get("Device_ID", 0xFF),
+        *encode_connection(hpc_data_dict["Connection"]),
+        encode_doors(hpc_data_dict["Door"]),
+        flags,
+        first_path_power, aoa, distance,
+    )
+
+
+def _float32(value):
+    # Shortest decimal that round-trips the float32: -65.2 stays -65.2, not -65.19999694824219
+    return float(str(np.float32(value)))
+
+
+def decode_fields(timestamp, device_id, vehicle, ble, uwb, door, flags, first_path_power, aoa, distance):
+    # -> (timestamp, hpc_data_dict)
+    hpc_data_dict = {
+        "Connection": decode_connection(vehicle, ble, uwb),
+        "Door": decode_doors(door),
+        "Ranging": {
+            "FirstPathPower": _float32(first_path_power),
+            "AOA": _float32(aoa),
+            "Distance": _float32(distance),
+        } if flags & FLAG_RANGING else None,
+        "Device_ID": int(device_id),
+    }
+    return float(timestamp), hpc_data_dict
+
+
+def decode_frame(data, offset=0):
+    return decode_fields(*FRAME_STRUCT.unpack_from(data, offset))
+
+
+def decode_record(record):
+    # record: one row of a FRAME_DTYPE array
+    return decode_fields(*record.tolist())
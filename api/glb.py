@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+
+
+#Offline GLB processing for the vehicle and avatar models
+#   python -m api.glb report static/*.glb
+#       size, meshes, triangles, vertices, textures (with their resolution) and compression extensions of each file,
+#       parsed here, no dependency
+#   python -m api.glb optimize static/FL.glb ... [--compress draco|meshopt|quantize] [--texture-size 1024] [--in-place]
+#       runs gltf-transform (npm install -g @gltf-transform/cli) on each file:
+#           dedup / instance / flatten / join: static meshes of one file sharing a material are merged
+#           quantize + Draco or Meshopt geometry compression, textures resized (and converted to WebP)
+#       Door GLBs stay separate files, car.js animates each one on its own
+#       Prints the report before / after, writes to --out unless --in-place
+#       The decoders of the chosen compression are copied to static/vendor/ first (see vendor),
+#       nothing is written when they are missing: a compressed GLB never ships without its decoder
+#   python -m api.glb vendor --three node_modules/three
+#       copies the Draco and Meshopt decoders of the three package to static/vendor/, where
+#       SceneManager.createGLTFLoader (static/scene.js) loads them: compressed GLBs decode without any CDN
+#       Commit static/vendor/ together with the optimized GLBs
+GLB_MAGIC = b"glTF"
+GLB_HEADER = struct.Struct("<4sII")
+GLB_CHUNK = struct.Struct("<I4s")
+CHUNK_JSON = b"JSON"
+CHUNK_BIN = b"BIN\x00"
+
+# glTF primitive modes
+MODE_TRIANGLES, MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN = 4, 5, 6
+
+VENDOR_DIR = os.path.join("static", "vendor")
+# three package path -> static/vendor path
+DECODER_FILES = {
+    os.path.join("examples", "jsm", "libs", "draco", "gltf", "draco_decoder.js"): os.path.join("draco", "draco_decoder.js"),
+    os.path.join("examples", "jsm", "libs", "draco", "gltf", "draco_decoder.wasm"): os.path.join("draco", "draco_decoder.wasm"),
+    os.path.join("examples", "jsm", "libs", "draco", "gltf", "draco_wasm_wrapper.js"): os.path.join("draco", "draco_wasm_wrapper.js"),
+    os.path.join("examples", "jsm", "libs", "meshopt_decoder.module.js"): "meshopt_decoder.module.js",
+}
+# --compress -> static/vendor files the browser needs, KHR_mesh_quantization is decoded by GLTFLoader itself
+REQUIRED_DECODERS = {
+    "draco": [target for target in DECODER_FILES.values() if target.startswith("draco")],
+    "meshopt": ["meshopt_decoder.module.js"],
+    "quantize": [],
+}
+
+
+def read_glb(path):
+    """
+    Returns:
+        tuple: (glTF JSON dict, BIN chunk bytes or b"")
+
+    Raises:
+        ValueError: Not a binary glTF 2.0 file
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < GLB_HEADER.size:
+        raise ValueError(f"{path} is too short for a GLB")
+    magic, version, length = GLB_HEADER.unpack_from(data)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError(f"{path} is not a binary glTF 2.0 file")
+
+    gltf, binary = None, b""
+    offset = GLB_HEADER.size
+    while offset + GLB_CHUNK.size <= min(length, len(data)):
+        chunk_length, chunk_type = GLB_CHUNK.unpack_from(data, offset)
+        chunk = data[offset + GLB_CHUNK.size:offset + GLB_CHUNK.size + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif chunk_type == CHUNK_BIN:
+            binary = chunk
+        offset += GLB_CHUNK.size + chunk_length
+    if gltf is None:
+        raise ValueError(f"{path} has no JSON chunk")
+    return gltf, binary
+
+
+def image_size(data: bytes):
+    # (width, height) of a PNG or JPEG, None for other formats
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:2] == b"\xff\xd8":
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+            # Start of frame markers carry the size, except DHT / JPG / DAC
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + length
+    return None
+
+
+def primitive_triangles(gltf, primitive):
+    accessors = gltf.get("accessors", [])
+    mode = primitive.get("mode", MODE_TRIANGLES)
+    if "indices" in primitive:
+        count = accessors[primitive["indices"]]["count"]
+    else:
+        count = accessors[primitive["attributes"]["POSITION"]]["count"]
+    if mode == MODE_TRIANGLES:
+        return count // 3
+    if mode in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+        return max(count - 2, 0)
+    # Points and lines
+    return 0
+
+
+def glb_report(path) -> dict:
+    gltf, binary = read_glb(path)
+    accessors = gltf.get("accessors", [])
+    meshes = gltf.get("meshes", [])
+
+    # A mesh drawn by several nodes costs its triangles once per node
+    uses = [0] * len(meshes)
+    for node in gltf.get("nodes", []):
+        if "mesh" in node:
+            uses[node["mesh"]] += 1
+
+    triangles = vertices = primitives = 0
+    for mesh, count in zip(meshes, uses):
+        for primitive in mesh.get("primitives", []):
+            primitives += 1
+            triangles += primitive_triangles(gltf, primitive) * count
+            vertices += accessors[primitive["attributes"]["POSITION"]]["count"] * count
+
+    textures = []
+    buffer_views = gltf.get("bufferViews", [])
+    for image in gltf.get("images", []):
+        entry = {"name": image.get("name", ""), "mimeType": image.get("mimeType", "")}
+        if "bufferView" in image:
+            view = buffer_views[image["bufferView"]]
+            start = view.get("byteOffset", 0)
+            data = binary[start:start + view["byteLength"]]
+            entry["bytes"] = view["byteLength"]
+            entry["size"] = image_size(data)
+        textures.append(entry)
+
+    return {
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "bin_bytes": len(binary),
+        "meshes": len(meshes),
+        "primitives": primitives,
+        "nodes": len(gltf.get("nodes", [])),
+        "materials": len(gltf.get("materials", [])),
+        "triangles": triangles,
+        "vertices": vertices,
+        "textures": textures,
+        "texture_bytes": sum(texture.get("bytes", 0) for texture in textures),
+        "animations": len(gltf.get("animations", [])),
+        "extensions": sorted(gltf.get("extensionsUsed", [])),
+    }
+
+
+def print_report(reports):
+    print(f"{'file':<44} {'bytes':>10} {'tris':>8} {'verts':>8} {'prims':>6} {'tex bytes':>10}  extensions")
+    for report in reports:
+        print(f"{os.path.basename(report['path']):<44} {report['bytes']:>10} {report['triangles']:>8} "
+              f"{report['vertices']:>8} {report['primitives']:>6} {report['texture_bytes']:>10}  "
+              f"{', '.join(report['extensions']) or '-'}")
+        for texture in report["textures"]:
+            size = "x".join(map(str, texture["size"])) if texture.get("size") else "?"
+            print(f"    texture {texture['name'] or '(unnamed)'} {texture['mimeType']} {size} {texture.get('bytes', 0)} B")
+
+
+def gltf_transform_command():
+    executable = shutil.which("gltf-transform")
+    if executable is None:
+        raise SystemExit("gltf-transform not found: npm install -g @gltf-transform/cli")
+    return [executable]
+
+
+def optimize(source, target, compress="draco", texture_size=1024, texture_compress="webp", simplify=False):
+    # One gltf-transform pass, see the header comment for what it does
+    command = gltf_transform_command() + [
+        "optimize", source, target,
+        "--compress", compress,
+        "--texture-size", str(texture_size),
+        "--texture-compress", texture_compress,
+        "--simplify", "true" if simplify else "false",
+        "--join", "true",
+        "--instance", "true",
+        "--flatten", "true",
+    ]
+    subprocess.run(command, check=True)
+
+
+def vendor_decoders(three_dir, vendor_dir=VENDOR_DIR):
+    missing = [source for source in DECODER_FILES if not os.path.isfile(os.path.join(three_dir, source))]
+    if missing:
+        raise SystemExit(f"{three_dir} is not a three package (missing {missing[0]}), npm install three first")
+    for source, target in DECODER_FILES.items():
+        target = os.path.join(vendor_dir, target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(three_dir, source), target)
+        print(f"{target}")
+
+
+def ensure_decoders(compress, three_dir, vendor_dir=VENDOR_DIR):
+    missing = [name for name in REQUIRED_DECODERS[compress] if not os.path.isfile(os.path.join(vendor_dir, name))]
+    if missing:
+        # Raises SystemExit when three_dir does not have them either
+        vendor_decoders(three_dir, vendor_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on and optimize the GLB models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = commands.add_parser("report", help="Size, triangle and texture report")
+    report_parser.add_argument("files", nargs="+")
+    report_parser.add_argument("--json", action="store_true", help="Machine-readable output")
+
+    optimize_parser = commands.add_parser("optimize", help="Quantize, compress and merge with gltf-transform")
+    optimize_parser.add_argument("files", nargs="+")
+    optimize_parser.add_argument("--out", default=os.path.join("static", "optimized"), help="Output directory")
+    optimize_parser.add_argument("--in-place", action="store_true", help="Replace the source files")
+    optimize_parser.add_argument("--compress", choices=("draco", "meshopt", "quantize"), default="draco")
+    optimize_parser.add_argument("--texture-size", type=int, default=1024, help="Max texture width / height")
+    optimize_parser.add_argument("--texture-compress", default="webp", help="webp, avif, ktx2 or false")
+    optimize_parser.add_argument("--simplify", action="store_true", help="Also decimate meshes (lossy)")
+    optimize_parser.add_argument("--three", default=os.path.join("node_modules", "three"),
+                                 help="three package dir, source of missing static/vendor decoders")
+
+    vendor_parser = commands.add_parser("vendor", help="Copy the Draco / Meshopt decoders to static/vendor")
+    vendor_parser.add_argument("--three", default=os.path.join("node_modules", "three"), help="three package dir")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        reports = [glb_report(path) for path in args.files]
+        if args.json:
+            print(json.dumps(reports, indent=2))
+        else:
+            print_report(reports)
+    elif args.command == "optimize":
+        ensure_decoders(args.compress, args.three)
+        before = [glb_report(path) for path in args.files]
+        outputs = []
+        os.makedirs(args.out, exist_ok=True)
+        for path in args.files:
+            if args.in_place:
+                # Written next to the source first: a failed run leaves the source untouched
+                handle, target = tempfile.mkstemp(suffix=".glb", dir=os.path.dirname(path) or ".")
+                os.close(handle)
+            else:
+                target = os.path.join(args.out, os.path.basename(path))
+            optimize(path, target, args.compress, args.texture_size, args.texture_compress, args.simplify)
+            if args.in_place:
+                os.replace(target, path)
+                target = path
+            outputs.append(target)
+        print("Before:")
+        print_report(before)
+        print("After:")
+        print_report([glb_report(path) for path in outputs])
+    else:
+        vendor_decoders(args.three)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+from numpy.lib import recfunctions
+
+
+#Ranging history of one device
+#   Fixed-capacity ring buffer backed by one NumPy structured array:
+#       appending a sample writes one row in place, no Python object is kept per sample
+#   When full, the oldest samples are overwritten
+#   Queries return a copy ordered by time, optionally restricted to a time range and a set of fields
+HISTORY_DTYPE = np.dtype([
+    ("timestamp", "<f8"),       # secs
+    ("AOA", "<f4"),             # degree
+    ("Distance", "<f4"),        # cm
+    ("FirstPathPower", "<f4"),  # dbm
+    ("x", "<f4"),               # cm
+    ("y", "<f4"),               # cm
+    ("TurnAngle", "<f4"),       # rad
+])
+HISTORY_FIELDS = HISTORY_DTYPE.names
+HISTORY_CAPACITY = 65536   # 2 MB per device
+
+
+class RangingHistory:
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        # Index of the next row to write
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, aoa, distance, first_path_power, x, y, turn_angle):
+        with self._lock:
+            self._buffer[self._next] = (timestamp, aoa, distance, first_path_power, x, y, turn_angle)
+            self._next = (self._next + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def _ordered(self):
+        if self._count < self.capacity:
+            return self._buffer[:self._count].copy()
+        return np.concatenate((self._buffer[self._next:], self._buffer[:self._next]))
+
+    def query(self, start=None, end=None, fields=None):
+        """
+        Samples between start and end (inclusive), oldest first.
+
+        Args:
+            start, end: Timestamps (secs), unbounded when None
+            fields: Field names to keep, every field when None. timestamp is always kept
+
+        Returns:
+            numpy structured array, packed (no padding between fields)
+        """
+        unknown = [field for field in (fields or ()) if field not in HISTORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Valid fields: {', '.join(HISTORY_FIELDS)}")
+
+        with self._lock:
+            samples = self._ordered()
+
+        if start is not None or end is not None:
+            timestamps = samples["timestamp"]
+            mask = np.ones(len(samples), dtype=bool)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps <= end
+            samples = samples[mask]
+
+        if fields:
+            names = ["timestamp"] + [field for field in fields if field != "timestamp"]
+            samples = recfunctions.repack_fields(samples[names])
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+
+def to_columns(samples) -> dict:
+    # {"timestamp": [...], "AOA": [...], ...}
+    return {name: samples[name].tolist() for name in samples.dtype.names}
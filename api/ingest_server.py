@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import struct
+import threading
+
+from api.log import log_fields, should_log
+
+
+#Persistent TCP ingest for the HPC
+#   One long-lived connection per HPC instead of a new HTTP POST per frame
+#   Every frame is length-prefixed:
+#       [ length : uint32 big-endian ][ payload : length bytes, UTF-8 JSON hpc_data_dict ]
+#   Frames are applied in order per connection through the same handler as POST /api
+#   The server never replies, the HPC just keeps writing frames
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def decode_frame(payload: bytes) -> dict:
+    return json.loads(payload)
+
+
+def encode_frame(hpc_data: dict) -> bytes:
+    payload = json.dumps(hpc_data, separators=(",", ":")).encode()
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class IngestServer:
+    def __init__(self, handler, host="0.0.0.0", port=8888):
+        """
+        Args:
+            handler: Called with every decoded hpc_data_dict, e.g. convert_hpc2ui
+            host, port: Listening address
+        """
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.frames = 0
+        self.errors = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        self.connections += 1
+        logger.info("HPC connected on TCP ingest", extra=log_fields("connection", peer=peer))
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                (length,) = FRAME_HEADER.unpack(header)
+                if length > MAX_FRAME_SIZE:
+                    # The stream cannot be resynchronized, drop the connection
+                    logger.warning("Oversized TCP frame, closing", extra=log_fields("connection", peer=peer, length=length, limit=MAX_FRAME_SIZE))
+                    self.errors += 1
+                    break
+
+                payload = await reader.readexactly(length)
+                try:
+                    hpc_data = decode_frame(payload)
+                    self.handler(hpc_data)
+                    self.frames += 1
+                except Exception as e:
+                    # A bad frame is skipped, framing is still in sync
+                    self.errors += 1
+                    if should_log("reject"):
+                        logger.warning("Rejected TCP frame", extra=log_fields("reject", peer=peer, error=repr(e), errors=self.errors))
+        except asyncio.IncompleteReadError:
+            pass
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            logger.info("HPC disconnected from TCP ingest", extra=log_fields("connection", peer=peer))
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self._started.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.serve())
+        except asyncio.CancelledError:
+            pass
+        except OSError as e:
+            # e.g. another worker of the same server already listens (HPC_TCP_INGEST=1, see app.py)
+            logger.warning("TCP ingest not started", extra=log_fields("connection", host=self.host, port=self.port,
+                                                                       error=str(e)))
+        finally:
+            self._started.set()
+            self._loop.close()
+
+    def start(self):
+        # Run the event loop next to the Flask server in a daemon thread
+        self._thread = threading.Thread(target=self._run, name="hpc-tcp-ingest", daemon=True)
+        self._thread.start()
+        self._started.wait(timeout=5)
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
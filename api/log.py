@@ -0,0 +1,154 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+
+#Non-blocking logging
+#   Request threads only put the record on a bounded queue, a QueueListener thread does the formatting and writing
+#   A slow terminal / journald pipe delays the listener thread, never a request. When the queue is full records are dropped
+#   Records carry a category and structured fields (extra=log_fields(...)), written as key=value or as JSON lines
+#   Per-category sampling: should_log(category) is True for 1 in N calls, checked before the record is even built
+#       LOG_SAMPLING = {category: N}, N = 1 logs every call, N = 0 disables the category
+#   Environment:
+#       HPC_LOG_LEVEL       DEBUG, INFO (default), WARNING, ...
+#       HPC_LOG_FORMAT      text (default) or json
+#       HPC_FRAME_LOGGING   0 disables frame-level logging ("frame" category)
+LOG_QUEUE_SIZE = 10000
+LOG_SAMPLING = {
+    "frame": 100,       # One log line per 100 HPC frames
+    "reject": 10,       # Bad frames can arrive at the frame rate as well
+}
+FRAME_LOGGING = os.environ.get("HPC_FRAME_LOGGING", "1") != "0"
+
+# category -> (N, call counter)
+_samplers = {}
+_listener = None
+
+
+def configure_sampling(category, every):
+    # every: log 1 in every calls, 0 disables the category
+    _samplers[category] = (every, itertools.count())
+
+
+for _category, _every in LOG_SAMPLING.items():
+    configure_sampling(_category, _every)
+if not FRAME_LOGGING:
+    configure_sampling("frame", 0)
+
+
+def set_frame_logging(enabled):
+    configure_sampling("frame", LOG_SAMPLING["frame"] if enabled else 0)
+
+
+def should_log(category):
+    sampler = _samplers.get(category)
+    if sampler is None:
+        return True
+    every, counter = sampler
+    if every <= 0:
+        return False
+    # next() on itertools.count is atomic under the GIL, no lock on the hot path
+    return next(counter) % every == 0
+
+
+def log_fields(category=None, **fields):
+    # logger.info("...", extra=log_fields("frame", device=1, uwb="Ranging"))
+    return {"category": category, "fields": fields}
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # QueueHandler.enqueue would block (or report an error) on a full queue, drop the record instead
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, json_lines=False):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+        self.json_lines = json_lines
+
+    def format(self, record):
+        category = getattr(record, "category", None)
+        fields = getattr(record, "fields", None) or {}
+        if self.json_lines:
+            entry = {
+                "time": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+            if category:
+                entry["category"] = category
+            entry.update(fields)
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = super().format(record)
+        if category:
+            line += f" category={category}"
+        for key, value in fields.items():
+            line += f" {key}={value}"
+        return line
+
+
+def setup_logging(level=None, stream=None, json_lines=None):
+    """
+    Route every logger (werkzeug included) through one queue and one writer thread.
+    Calling it again only returns the running listener.
+
+    Args:
+        level: Root level, HPC_LOG_LEVEL or INFO when None
+        stream: Output stream, stderr when None
+        json_lines: JSON records instead of key=value text, HPC_LOG_FORMAT=json when None
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    if level is None:
+        level = os.environ.get("HPC_LOG_LEVEL", "INFO").upper()
+    if json_lines is None:
+        json_lines = os.environ.get("HPC_LOG_FORMAT", "text") == "json"
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(StructuredFormatter(json_lines))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
+    # Flush what is still queued on exit
+    atexit.register(_listener.stop)
+    # The writer thread does not survive fork (gunicorn --preload), every worker starts its own
+    os.register_at_fork(after_in_child=_restart_listener)
+    return _listener
+
+
+def _restart_listener():
+    if _listener is None:
+        return
+    # A fresh queue: records still queued at fork belong to the parent (and its lock may be held)
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            handler.queue = log_queue
+    _listener.queue = log_queue
+    _listener._thread = None
+    _listener.start()
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+
+from flask import Response, g, request
+
+
+#In-process metrics, exposed at /metrics in Prometheus text format (version 0.0.4)
+#   Counter and Histogram keep one slot per label tuple, updating it is a dict lookup under a per-metric lock
+#   Gauge values are read from a callback at scrape time, nothing to update on the hot path
+#   Everything is rendered on scrape, the hot path never formats text
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# secs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+INTER_ARRIVAL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+                                for labels, value in values]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._values = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slot = self._values.get(labels)
+            if slot is None:
+                slot = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            slot[0][index] += 1
+            slot[1] += value
+
+    def render(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, callback):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self):
+        return self.header() + [f"{self.name} {_format_value(self.callback())}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+hpc_frames = registry.counter(
+    "hpc_frames_total", "HPC frames ingested", ("device", "uwb_status"))
+hpc_frame_errors = registry.counter(
+    "hpc_frame_errors_total", "HPC frames that could not be ingested")
+hpc_inter_arrival = registry.histogram(
+    "hpc_inter_arrival_seconds", "Time between two frames of the same device", ("device",), INTER_ARRIVAL_BUCKETS)
+state_publishes = registry.counter(
+    "state_publishes_total", "Frames published to a state store", ("store",))
+state_section_publishes = registry.counter(
+    "state_section_publishes_total", "Dashboard sections that changed on publish", ("section",))
+publisher_ticks = registry.counter(
+    "publisher_ticks_total", "Ticks of the fixed-rate publisher that published something")
+publisher_frames = registry.counter(
+    "publisher_frames_total", "Frames handed to the fixed-rate publisher, by outcome", ("result",))
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests handled", ("route", "method", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to build the response (streams: until the first byte)", ("route", "method"))
+
+
+def _route():
+    # The URL rule keeps the label set bounded (/api/devices/<int:device_id>, not one label per id)
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        route = _route()
+        http_request_duration.observe(time.perf_counter() - start, route, request.method)
+        http_requests.inc(route, request.method, str(response.status_code))
+    return response
+
+
+def metrics_view():
+    return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    # Times every request of the app and adds GET /metrics
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import deque
+
+from api import metrics
+from api.events import EVENT_SECTIONS
+
+
+#Fixed-rate publisher between ingest and the readers
+#   Ingest hands every built UI frame to submit() and returns, publishing happens on one tick thread:
+#       at most one publish per device (and one dashboard publish) every 1 / rate_hz secs
+#       /stream, /feed and the state routes move in evenly spaced steps whatever rate the HPCs send at
+#   Frames received within a tick are coalesced, only the latest reaches the readers
+#   Except discrete transitions: a frame whose Connection or Door differs from the previous frame
+#   of the same device is queued behind the pending one instead of replacing it, so every open/close,
+#   lock/unlock and status is visible for at least one tick (and recorded in /events regardless)
+#   Frames of different devices are never transitions of each other: on the dashboard lane they
+#   coalesce to the latest, only a queued transition is kept from being replaced by another device
+#   The tick thread sleeps while nothing is pending: after an idle period a frame is published at once
+DEFAULT_RATE_HZ = 60.0
+# Transitions queued per lane, beyond that they are coalesced as well (still in /events)
+MAX_PENDING_TRANSITIONS = 64
+
+# Lane of the frames shown by the dashboard, whichever device sent them
+DASHBOARD = object()
+
+
+def is_transition(previous: dict, frame: dict, sections=EVENT_SECTIONS) -> bool:
+    # Sections are shared between frames while unchanged, the identity test is the common case
+    return any(previous[section] is not frame[section] and previous[section] != frame[section]
+               for section in sections)
+
+
+class TickPublisher:
+    def __init__(self, publish_device, publish_dashboard, rate_hz=DEFAULT_RATE_HZ,
+                 max_pending=MAX_PENDING_TRANSITIONS):
+        """
+        Args:
+            publish_device: Called as publish_device(device, frame) on the tick thread
+            publish_dashboard: Called as publish_dashboard(device, frame) on the tick thread
+            rate_hz: Publishes per second at most
+
+        Raises:
+            ValueError: rate_hz is not positive
+        """
+        if rate_hz <= 0:
+            raise ValueError(f"rate_hz must be positive, got {rate_hz}")
+        self.publish_device = publish_device
+        self.publish_dashboard = publish_dashboard
+        self.period = 1.0 / rate_hz
+        self.max_pending = max_pending
+        self._init_state()
+
+    def _init_state(self):
+        # Lane key (DeviceEntry or DASHBOARD) -> deque of [device, frame, transition], oldest first
+        self._lanes = {}
+        # Device -> last frame it submitted to the dashboard lane, what its transitions compare with
+        self._dashboard_frames = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def rate_hz(self):
+        return 1.0 / self.period
+
+    def submit(self, device, frame: dict, dashboard=True):
+        # Called by ingest, never blocks on a publish
+        with self._lock:
+            lane = self._lanes.get(device)
+            self._enqueue(device, device, frame, lane[-1][1] if lane else None)
+            if dashboard:
+                self._enqueue(DASHBOARD, device, frame, self._dashboard_frames.get(device))
+                self._dashboard_frames[device] = frame
+        self._wake.set()
+
+    def _enqueue(self, key, device, frame, previous):
+        # previous: last frame of the same device in this lane, None when there is nothing to compare with
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+        transition = previous is not None and is_transition(previous, frame)
+        if not lane:
+            lane.append([device, frame, transition])
+            return
+        pending = lane[-1]
+        if len(lane) < self.max_pending and (transition or (pending[2] and pending[0] is not device)):
+            # A transition of this device, or a frame that would replace another device's transition
+            lane.append([device, frame, transition])
+            return
+        # Same Connection and Door as before, or another device's plain frame: the latest wins
+        pending[0], pending[1] = device, frame
+        pending[2] = pending[2] or transition
+        metrics.publisher_frames.inc("coalesced")
+
+    def flush(self) -> bool:
+        """
+        Publish the next frame of every lane, what one tick does.
+
+        Returns:
+            bool: Queued transitions are left for the next tick
+        """
+        with self._lock:
+            batch = [(key, lane.popleft()[:2]) for key, lane in self._lanes.items() if lane]
+            more = any(self._lanes.values())
+        for key, (device, frame) in batch:
+            if key is DASHBOARD:
+                continue
+            self.publish_device(device, frame)
+            metrics.publisher_frames.inc("published")
+        # The dashboard last: its device store is never behind what the dashboard shows
+        for key, (device, frame) in batch:
+            if key is DASHBOARD:
+                self.publish_dashboard(device, frame)
+        if batch:
+            metrics.publisher_ticks.inc()
+        return more
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stopped.is_set():
+            self._wake.wait()
+            delay = next_tick - time.monotonic()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            # Cleared before flushing: a frame submitted meanwhile wakes the next tick
+            self._wake.clear()
+            next_tick = time.monotonic() + self.period
+            if self.flush():
+                self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tick-publisher", daemon=True)
+            self._thread.start()
+        return self
+
+    def restart_after_fork(self):
+        # The tick thread and the pending frames of the parent do not survive fork
+        self._init_state()
+        self.start()
+
+    def stop(self, flush=True):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            while self.flush():
+                pass
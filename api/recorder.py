@@ -0,0 +1,108 @@
+import os
+import struct
+import threading
+
+import numpy as np
+
+from api.frame_codec import FRAME_DTYPE, FRAME_STRUCT, decode_record, encode_frame
+
+
+#Session recording
+#   Append-only binary log of every HPC frame with its arrival timestamp
+#   File = 16-byte header + fixed-size records (api/frame_codec.py FRAME_DTYPE)
+#       header: magic b"HPCREC01" | record size uint32 | reserved uint32
+#   Fixed records -> a recording is memory-mapped as a NumPy array, record i is at 16 + i * size
+RECORDINGS_DIR = "recordings"
+RECORD_MAGIC = b"HPCREC01"
+RECORD_HEADER = struct.Struct("<8sII")
+
+
+def recording_path(name):
+    # API callers only choose a file name, recordings always live in RECORDINGS_DIR
+    name = os.path.basename(name or "")
+    if not name:
+        raise ValueError("A recording name is required")
+    return os.path.join(RECORDINGS_DIR, name)
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unbuffered: every record is one write(), the file can be mapped while recording
+        self._file = open(path, "ab", buffering=0)
+        if self._file.tell() == 0:
+            self._file.write(RECORD_HEADER.pack(RECORD_MAGIC, FRAME_STRUCT.size, 0))
+        else:
+            check_header(path)
+
+    def record(self, hpc_data_dict: dict, timestamp):
+        try:
+            data = encode_frame(hpc_data_dict, timestamp)
+        except (KeyError, TypeError, ValueError, struct.error):
+            # Not a frame the server could use either, keep the log readable
+            self.skipped += 1
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.write(data)
+                self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def status(self):
+        return {"path": self.path, "records": self.records, "skipped": self.skipped,
+                "recording": self._file is not None}
+
+
+def check_header(path):
+    with open(path, "rb") as f:
+        header = f.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        raise ValueError(f"{path} is not a session recording (file too short)")
+    magic, record_size, _ = RECORD_HEADER.unpack(header)
+    if magic != RECORD_MAGIC or record_size != FRAME_STRUCT.size:
+        raise ValueError(f"{path} is not a session recording of this version")
+
+
+class SessionReader:
+    def __init__(self, path):
+        check_header(path)
+        self.path = path
+        size = os.path.getsize(path) - RECORD_HEADER.size
+        count = size // FRAME_DTYPE.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=FRAME_DTYPE, mode="r", offset=RECORD_HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=FRAME_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    def duration(self):
+        if not len(self):
+            return 0.0
+        return float(self.timestamps[-1] - self.timestamps[0])
+
+    def frame(self, index):
+        # -> (arrival timestamp, hpc_data_dict)
+        return decode_record(self.records[index])
+
+    def index_at(self, offset):
+        # First record at or after offset secs from the start of the recording
+        if not len(self):
+            return 0
+        return int(np.searchsorted(self.timestamps, self.timestamps[0] + offset, side="left"))
@@ -0,0 +1,136 @@
+import argparse
+import threading
+import time
+
+from api.recorder import SessionReader
+
+
+#Replay of a session recording (api/recorder.py)
+#   Feeds the recorded frames back through the ingest pipeline with their recorded timestamps
+#   speed = 1 -> real time, N -> N times faster, 0 -> as fast as possible
+#   seek() jumps to an offset (secs from the start of the recording) while playing
+#
+#CLI, replays in-process through convert_hpc2ui and reports the throughput:
+#   python -m api.replay recordings/session.rec --speed 100 --seek 30
+
+
+class Replayer:
+    def __init__(self, reader: SessionReader, handler, speed=1.0):
+        """
+        Args:
+            reader: Opened recording
+            handler: Called with (hpc_data_dict, timestamp) for every frame
+            speed: Replay speed factor, 0 for maximum speed
+        """
+        self.reader = reader
+        self.handler = handler
+        self.speed = speed
+        self.position = 0
+        self.frames = 0
+        self.errors = 0
+        self.started = None
+        self.finished = None
+        self._seek_to = None
+        self._stop = threading.Event()
+        # Set by stop() and seek() to interrupt the wait for the next frame
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def seek(self, offset):
+        with self._lock:
+            self._seek_to = self.reader.index_at(offset)
+            if self._thread is None:
+                self.position = self._seek_to
+                self._seek_to = None
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        # Blocking replay from self.position to the end of the recording (or stop())
+        self.started = time.time()
+        base_clock = base_timestamp = None
+        count = len(self.reader)
+        while self.position < count and not self._stop.is_set():
+            with self._lock:
+                if self._seek_to is not None:
+                    self.position = self._seek_to
+                    self._seek_to = None
+                    base_clock = None
+                    continue
+
+            timestamp, hpc_data_dict = self.reader.frame(self.position)
+            if self.speed > 0:
+                if base_clock is None:
+                    base_clock, base_timestamp = time.monotonic(), timestamp
+                delay = base_clock + (timestamp - base_timestamp) / self.speed - time.monotonic()
+                if delay > 0 and self._wake.wait(delay):
+                    # Woken up by seek() or stop()
+                    self._wake.clear()
+                    continue
+
+            try:
+                self.handler(hpc_data_dict, timestamp)
+            except Exception:
+                # A frame that broke the live server breaks the replay the same way, keep going
+                self.errors += 1
+            self.position += 1
+            self.frames += 1
+        self.finished = time.time()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="session-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def status(self):
+        count = len(self.reader)
+        position = min(self.position, count - 1) if count else 0
+        offset = float(self.reader.timestamps[position] - self.reader.timestamps[0]) if count else 0.0
+        return {
+            "path": self.reader.path,
+            "speed": self.speed,
+            "position": self.position,
+            "count": count,
+            "offset": offset,
+            "duration": self.reader.duration(),
+            "frames": self.frames,
+            "errors": self.errors,
+            "running": self.running(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a session recording through convert_hpc2ui")
+    parser.add_argument("path", help="Recording file")
+    parser.add_argument("--speed", type=float, default=0, help="1 = real time, N = N times faster, 0 = maximum (default)")
+    parser.add_argument("--seek", type=float, default=0, help="Start offset in secs")
+    args = parser.parse_args()
+
+    from api.routes import ingest_hpc_frame
+
+    reader = SessionReader(args.path)
+    replayer = Replayer(reader, lambda frame, timestamp: ingest_hpc_frame(frame, timestamp, record=False), args.speed)
+    replayer.seek(args.seek)
+    print(f"Replaying {len(reader)} frames ({reader.duration():.1f} secs) from {args.path}")
+
+    start = time.perf_counter()
+    try:
+        replayer.run()
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - start
+    rate = replayer.frames / elapsed if elapsed > 0 else 0.0
+    print(f"Replayed {replayer.frames} frames in {elapsed:.3f} secs ({rate:.0f} frames/s), {replayer.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
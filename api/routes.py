@@ -1,7 +1,25 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+import logging
 import math
+import os
+import threading
 import time
 
+from api.devices import UNKNOWN_DEVICE_ID, DeviceEntry, DeviceRegistry
+from api.events import EventLog, transition_events
+from api.feed import feed_stream
+from api.frame_codec import FRAME_CONTENT_TYPE, FRAME_STRUCT, decode_frame
+from api import metrics
+from api.history import to_columns
+from api.log import log_fields, should_log
+from api.publisher import DEFAULT_RATE_HZ, TickPublisher
+from api.recorder import SessionReader, SessionRecorder, recording_path
+from api.replay import Replayer
+from api.schema import SchemaError, hpc_frame_schema
+from api.shm_state import SharedStateError, SharedStateStore
+from api.state import SECTIONS, StateStore, dumps
+from api.stream import StreamHub, event_stream, parse_topics
+
 
 TCP_HPC_PORT = 8888
 
@@ -118,6 +136,7 @@ hpc_data_dict = {
     "Device_ID" : 0xFF # 0xFF : Unknown, ...
 }
 
+# Initial UI frame, the live frame is published in state_store
 ui_data_dict = {
     #Info and Vehicle notification
     "Connection": {
@@ -148,6 +167,56 @@ ui_data_dict = {
 }
 
 api_bp = Blueprint("api_service", __name__)
+logger = logging.getLogger(__name__)
+
+# Readers take state_store.snapshot() without locking, ingest publishes whole frames
+# HPC_STATE_BACKEND=shm keeps it in shared memory instead (api/shm_state.py):
+#   every worker process (e.g. gunicorn -w 4 'app:create_app()') reads and publishes the same live frame
+#   Devices (filters, history) stay per process, an HPC should keep posting to one worker (TCP ingest does)
+STATE_BACKEND = os.environ.get("HPC_STATE_BACKEND", "memory")
+if STATE_BACKEND == "shm":
+    state_store = SharedStateStore(ui_data_dict, os.environ.get("HPC_STATE_SHM", "hpc_state"))
+else:
+    state_store = StateStore(ui_data_dict)
+
+# One state store and turn-angle history per Device_ID
+device_registry = DeviceRegistry(ui_data_dict)
+
+# Browser tabs subscribe to /stream instead of polling every route
+stream_hub = StreamHub()
+stream_hub.publish(state_store.snapshot().encoded)
+publish_lock = threading.Lock()
+
+def publish_stream(snapshot, changed):
+    # A new snapshot without changed sections: only the Device_ID changed, the feed shows it
+    if changed:
+        stream_hub.publish(snapshot.encoded, changed)
+    else:
+        stream_hub.publish_device(snapshot.data.get("Device_ID", UNKNOWN_DEVICE_ID))
+
+def watch_shared_state():
+    # Frames published by any process reach the /stream subscribers of this one
+    state_store.watch(publish_stream)
+
+if STATE_BACKEND == "shm":
+    watch_shared_state()
+    # Threads do not survive fork (gunicorn --preload), start one in every worker
+    os.register_at_fork(after_in_child=watch_shared_state)
+
+metrics.registry.gauge("stream_subscribers", "Open /stream connections", stream_hub.subscriber_count)
+metrics.registry.gauge("devices", "Devices seen since start", lambda: len(device_registry))
+
+# Door / Connection transitions of every device, /events
+event_log = EventLog()
+
+# Published by every non-ranging frame, shared between frames (published sections are never mutated)
+IDLE_RANGING = { "FirstPathPower":0, # dbm
+                 "AOA":0.0, # degree
+                 "Distance":0, # cm
+                 }
+IDLE_USER = { "x": 0,
+              "y": 0,
+              "TurnAngle": 0.0}
 
 
 def get_xy(CylindCoord):
@@ -156,84 +225,494 @@ def get_xy(CylindCoord):
     y = CylindCoord["Ranging"]["Distance"] * math.sin(angale_rad)
     return x, y
 
-def reset_getTurnAngle():
-    if hasattr(getTurnAngle, 'past_position'):
-        del getTurnAngle.past_position
-    if hasattr(getTurnAngle, 'current_position'):
-        del getTurnAngle.current_position
-
-def getTurnAngle(new_position):
-    # Access position history from function attributes
-    if not hasattr(getTurnAngle, 'current_position'):
-        # Initialize position history on first call
-        getTurnAngle.current_position = {"x": 0, "y": 0}
-        angle_rad = math.atan2(new_position["y"], new_position["x"]) - math.pi
-    else:
-    
-        try:
-            angle_rad = math.atan((new_position["y"] - getTurnAngle.current_position["y"])/(new_position["x"] - getTurnAngle.current_position["x"]))
-            if( new_position["x"] < getTurnAngle.current_position["x"]):
-                angle_rad += math.pi
-        except ZeroDivisionError:
-            angle_rad = math.pi / 2 if new_position["y"] > getTurnAngle.current_position["y"] else -math.pi / 2
-    
-    getTurnAngle.current_position = new_position
-    
-    return angle_rad
+def build_ui_frame(hpc_data_dict: dict, device: DeviceEntry, timestamp):
+    # Runs one HPC frame through the device pipeline (filter, trajectory, history) and returns the UI frame
+    # Nothing is published, see submit_ui_frame. Caller holds device.lock
 
-def convert_hpc2ui(hpc_data_dict: dict):
-    global ui_data_dict
-    ui_data_dict["Connection"] = hpc_data_dict["Connection"]
-    ui_data_dict["Door"] = hpc_data_dict["Door"]
+    # Build the next frame off to the side, the published snapshot is never touched
+    # previous is the last frame built for the device, published or not (batches publish only their last)
+    previous = device.last_frame
+    frame = dict(previous)
+    # Unchanged sections keep the previous objects: an identical frame allocates nothing for them
+    # Partial frames were completed by complete_frame before they got here
+    if hpc_data_dict["Connection"] != previous["Connection"]:
+        frame["Connection"] = dict(hpc_data_dict["Connection"])
+    if hpc_data_dict["Door"] != previous["Door"]:
+        frame["Door"] = {door: list(state) for door, state in hpc_data_dict["Door"].items()}
+    event_log.extend(transition_events(previous, frame, timestamp, device.device_id))
     #Only update User model when UwbStatus is Ranging or Mixed
-    if(ui_data_dict["Connection"]["UwbStatus"] == "Ranging" or ui_data_dict["Connection"]["UwbStatus"] == "Mixed"):
-        ui_data_dict["Ranging"] = hpc_data_dict["Ranging"]
-        ui_data_dict["User"]["x"], ui_data_dict["User"]["y"]  = get_xy(hpc_data_dict)
-        ui_data_dict["User"]["TurnAngle"] = getTurnAngle({"x": ui_data_dict["User"]["x"], "y": ui_data_dict["User"]["y"]})
+    if(frame["Connection"]["UwbStatus"] == "Ranging" or frame["Connection"]["UwbStatus"] == "Mixed"):
+        # No ranging sample in this frame (e.g. a door command): the User stays where it was
+        if hpc_data_dict.get("Ranging") is not None:
+            frame["Ranging"] = dict(hpc_data_dict["Ranging"])
+            x, y = get_xy(hpc_data_dict)
+            if device.ranging_filter is None:
+                frame["User"] = {"x": x,
+                                 "y": y,
+                                 "TurnAngle": device.trajectory.update(x, y, timestamp)}
+            else:
+                # Smoothed position, velocity and heading, an outlier keeps the predicted position
+                user = device.ranging_filter.update(x, y, frame["Ranging"]["Distance"],
+                                                    frame["Ranging"]["FirstPathPower"], timestamp)
+                if user is not None:
+                    frame["User"] = user
+                    # The tracker still runs for the speed of /devices, on the smoothed position
+                    device.trajectory.update(user["x"], user["y"], timestamp)
+            ranging = frame["Ranging"]
+            device.history.append(timestamp, ranging["AOA"], ranging["Distance"], ranging["FirstPathPower"],
+                                  frame["User"]["x"], frame["User"]["y"], frame["User"]["TurnAngle"])
     else:
-        reset_getTurnAngle()
-        ui_data_dict["Ranging"] = { "FirstPathPower":0, # dbm
-                                    "AOA":0.0, # degree
-                                    "Distance":0, # cm
-                                    }
+        device.trajectory.reset()
+        if device.ranging_filter is not None:
+            device.ranging_filter.reset()
+        frame["Ranging"] = IDLE_RANGING
+        frame["User"] = IDLE_USER
+
+    device_label = str(device.device_id)
+    metrics.hpc_frames.inc(device_label, frame["Connection"]["UwbStatus"])
+    # Arrival clock, not timestamp: batch / binary / replayed frames carry HPC-side or recorded times
+    arrival = time.monotonic()
+    if device.last_arrival is not None:
+        metrics.hpc_inter_arrival.observe(arrival - device.last_arrival, device_label)
+    device.last_arrival = arrival
+    device.frames += 1
+    device.last_seen = timestamp
+    device.last_frame = frame
+    return frame
+
+def publish_device_frame(device: DeviceEntry, frame: dict):
+    snapshot, _ = device.store.publish(frame)
+    metrics.state_publishes.inc("device")
+    return snapshot
 
-        ui_data_dict["User"]= { "x": 0,
-                                "y": 0,
-                                "TurnAngle": 0.0}
+def publish_dashboard_frame(device: DeviceEntry, frame: dict):
+    # The dashboard shows the latest frame of whichever device sent last
+    # publish_lock keeps /stream in the same order as state_store, it is held for two publishes only
+    with publish_lock:
+        previous = state_store.snapshot()
+        snapshot, changed = state_store.publish(frame)
+        # With shared state the watcher thread publishes, for the frames of every process
+        if snapshot is not previous and STATE_BACKEND != "shm":
+            publish_stream(snapshot, changed)
+    metrics.state_publishes.inc("dashboard")
+    for section in changed:
+        metrics.state_section_publishes.inc(section)
+    return snapshot
 
+def publish_ui_frame(device: DeviceEntry, frame: dict, dashboard=True):
+    # dashboard: also publish to state_store and /stream, False only updates the device
+    snapshot = publish_device_frame(device, frame)
+    if not dashboard:
+        return snapshot
+    return publish_dashboard_frame(device, frame)
 
-last_request_time= None
+# Readers get at most HPC_PUBLISH_RATE publishes per second (api/publisher.py), frames in between are coalesced
+# HPC_PUBLISH_RATE=0 publishes every frame as soon as it is built
+PUBLISH_RATE_HZ = float(os.environ.get("HPC_PUBLISH_RATE", DEFAULT_RATE_HZ))
+tick_publisher = None
+if PUBLISH_RATE_HZ > 0:
+    tick_publisher = TickPublisher(publish_device_frame, publish_dashboard_frame, PUBLISH_RATE_HZ).start()
+    os.register_at_fork(after_in_child=tick_publisher.restart_after_fork)
+
+def submit_ui_frame(device: DeviceEntry, frame: dict, dashboard=True):
+    # Returns the published snapshot, None when the frame waits for the next tick
+    if tick_publisher is None:
+        return publish_ui_frame(device, frame, dashboard)
+    tick_publisher.submit(device, frame, dashboard)
+    return None
+
+def convert_hpc2ui(hpc_data_dict: dict, device: DeviceEntry = None, timestamp=None):
+    # Caller holds device.lock (see ingest_hpc_frame)
+    # timestamp: sample time in secs, arrival time when None
+    if timestamp is None:
+        timestamp = time.time()
+    if device is None:
+        device = device_registry.get_or_create(hpc_data_dict.get("Device_ID", UNKNOWN_DEVICE_ID))
+    return submit_ui_frame(device, build_ui_frame(hpc_data_dict, device, timestamp))
+
+
+# Set by /record/start, every ingested frame is appended to it
+session_recorder = None
+# Set by /replay/start
+session_replayer = None
+
+def complete_frame(hpc_data_dict: dict, previous: dict) -> dict:
+    # Partial frame (api/schema.py) -> whole hpc_data_dict, absent Connection / Door fields from the
+    # previous frame of the device. Absent Ranging stays absent: no ranging sample. Caller holds device.lock
+    connection, doors = hpc_data_dict.get("Connection"), hpc_data_dict.get("Door")
+    if (connection is not None and len(connection) == len(previous["Connection"])
+            and doors is not None and len(doors) == len(previous["Door"])):
+        return hpc_data_dict
+    return dict(hpc_data_dict,
+                Connection={**previous["Connection"], **(connection or {})},
+                Door={**previous["Door"], **(doors or {})})
+
+def ingest_hpc_frame(hpc_data_dict: dict, timestamp=None, record=True):
+    # HTTP POSTs and the TCP ingest server (api/ingest_server.py) both land here
+    # Only frames of the same device are serialized
+    # timestamp: sample time for the filter and the history, HPC-side for binary frames
+    # Recordings always get the arrival time, one clock per session whatever the frames carry
+    arrival = time.time()
+    if timestamp is None:
+        timestamp = arrival
+    recorder = session_recorder
+
+    device = device_registry.get_or_create(hpc_data_dict.get("Device_ID", UNKNOWN_DEVICE_ID))
+    with device.lock:
+        # Completed first, recordings only hold whole frames and replay them as such
+        hpc_data_dict = complete_frame(hpc_data_dict, device.last_frame)
+        if record and recorder is not None:
+            # Recorded before conversion: a frame that breaks convert_hpc2ui is replayed as well
+            recorder.record(hpc_data_dict, arrival)
+        try:
+            return convert_hpc2ui(hpc_data_dict, device, timestamp)
+        except Exception:
+            metrics.hpc_frame_errors.inc()
+            raise
+
+# HPC_PARTIAL_FRAMES=1 accepts partial frames (api/schema.py) on every ingest path, ?partial=1|0 overrides it per POST
+PARTIAL_FRAMES = os.environ.get("HPC_PARTIAL_FRAMES", "0").lower() in ("1", "true", "yes")
+
+def validate_and_ingest(hpc_data_dict, timestamp=None, partial=PARTIAL_FRAMES):
+    # JSON from the HPC (POST /api, TCP ingest): checked against the schema before it reaches the pipeline
+    # Raises SchemaError, nothing is recorded or ingested
+    try:
+        hpc_data_dict = hpc_frame_schema.validate(hpc_data_dict, partial)
+    except SchemaError:
+        metrics.hpc_frame_errors.inc()
+        raise
+    return ingest_hpc_frame(hpc_data_dict, timestamp)
+
+class BatchError(Exception):
+    def __init__(self, index, error):
+        super().__init__(f"Frame {index}: {type(error).__name__}: {error}")
+        self.index = index
+
+def ingest_hpc_batch(frames: list, record=True):
+    """
+    Apply frames in order through the device pipelines, then publish only the last state.
+
+    Args:
+        frames: hpc_data_dict list, each with an optional HPC-side "timestamp" (secs), used by the
+                filter and the history. Recordings get the arrival time of the batch, like every other frame
+
+    Returns:
+        int: Number of frames applied. On error the frames before the bad one are applied and published
+
+    Raises:
+        BatchError: frames[index] could not be applied
+    """
+    arrival = time.time()
+    recorder = session_recorder
+    # Device -> its last frame of the batch, in order of last update
+    last_frames = {}
+    applied = 0
+    try:
+        for index, hpc_data_dict in enumerate(frames):
+            try:
+                timestamp = hpc_data_dict.get("timestamp", arrival)
+                device = device_registry.get_or_create(hpc_data_dict.get("Device_ID", UNKNOWN_DEVICE_ID))
+                with device.lock:
+                    hpc_data_dict = complete_frame(hpc_data_dict, device.last_frame)
+                    if record and recorder is not None:
+                        recorder.record(hpc_data_dict, arrival)
+                    frame = build_ui_frame(hpc_data_dict, device, timestamp)
+            except Exception as e:
+                metrics.hpc_frame_errors.inc()
+                raise BatchError(index, e) from e
+            last_frames.pop(device, None)
+            last_frames[device] = frame
+            applied += 1
+    finally:
+        # Every device gets its last frame, the dashboard only the last frame of the batch
+        for position, (device, frame) in enumerate(last_frames.items(), 1):
+            with device.lock:
+                submit_ui_frame(device, frame, dashboard=position == len(last_frames))
+    return applied
+
+
+@api_bp.errorhandler(SharedStateError)
+def shared_state_unavailable(error):
+    # A worker died mid-publish (HPC_STATE_BACKEND=shm), the next frame repairs the state
+    return jsonify({"status": "error", "message": str(error)}), 503
 
 @api_bp.route('/', methods=['POST'])
 def post_data():
-    global last_request_time
-    current_time = time.time()
-
-    if last_request_time is not None:
-        time_different = current_time - last_request_time
-        print(f"[+] Time since last HPC POST: {time_different:.4f} secs")
-    
-    last_request_time = current_time
+    # Time between HPC POSTs is in /metrics (hpc_inter_arrival_seconds)
+    if request.mimetype == FRAME_CONTENT_TYPE:
+        return post_binary_frame()
 
-    convert_hpc2ui(request.get_json())
+    hpc_data_dict = request.get_json(silent=True)
+    try:
+        validate_and_ingest(hpc_data_dict, time.time(), partial_frames())
+    except SchemaError as e:
+        return reject_frame(e)
+    log_hpc_frame(hpc_data_dict)
 
     return jsonify({
         "status": "success",
         "recieved": request.get_json(),
     }), 200
+
+def post_binary_frame():
+    # One fixed-size record (api/frame_codec.py), no echo: the reply is as small as the request
+    data = request.get_data(cache=False)
+    if len(data) != FRAME_STRUCT.size:
+        return jsonify({"status": "error",
+                        "message": f"Expected a {FRAME_STRUCT.size}-byte frame, got {len(data)} bytes"}), 400
+    timestamp, hpc_data_dict = decode_frame(data)
+    # Same checks as JSON frames: NaN / inf floats and status codes past the enums (decoded as "Unknown") are rejected
+    try:
+        hpc_data_dict = hpc_frame_schema.validate(dict(hpc_data_dict, timestamp=timestamp))
+    except SchemaError as e:
+        metrics.hpc_frame_errors.inc()
+        return reject_frame(e)
+    timestamp = hpc_data_dict.pop("timestamp")
+    # A zero timestamp means the HPC has no clock, the arrival time is used instead
+    ingest_hpc_frame(hpc_data_dict, timestamp or None)
+    log_hpc_frame(hpc_data_dict)
+    return Response(status=204)
+
+def partial_frames():
+    value = request.args.get("partial")
+    return PARTIAL_FRAMES if value is None else value.lower() in ("1", "true", "yes")
+
+def reject_frame(error: SchemaError, **fields):
+    # 400 listing every problem, no traceback: {"status": "error", "message": ..., "errors": [{"path", "message"}]}
+    if should_log("reject"):
+        logger.warning("Rejected HPC frame", extra=log_fields("reject", error=str(error)))
+    return jsonify({"status": "error", "message": str(error), "errors": error.errors, **fields}), 400
+
+def log_hpc_frame(hpc_data_dict):
+    if should_log("frame"):
+        connection = hpc_data_dict.get("Connection") or {}
+        logger.info("HPC POST", extra=log_fields("frame", device=hpc_data_dict.get("Device_ID"),
+                                                 uwb=connection.get("UwbStatus")))
     
+def json_response(body: bytes, status=200):
+    # body is already encoded (StateSnapshot.encoded), skip jsonify
+    return Response(body, status=status, mimetype="application/json")
+
 @api_bp.route('/connection')
 def get_connection():
-    return jsonify(ui_data_dict["Connection"])
+    return json_response(state_store.snapshot().encoded["Connection"])
 
 @api_bp.route('/door')
 def get_door():
-    return jsonify(ui_data_dict["Door"])
+    return json_response(state_store.snapshot().encoded["Door"])
 
 @api_bp.route('/ranging')
 def get_ranging():
-    return jsonify(ui_data_dict["Ranging"])
+    return json_response(state_store.snapshot().encoded["Ranging"])
 
 @api_bp.route('/user')
 def get_animation_state():
-    return jsonify(ui_data_dict["User"])
+    return json_response(state_store.snapshot().encoded["User"])
+
+@api_bp.route('/stream')
+def get_stream():
+    # Server-Sent Events: /stream?topics=Connection,Door (every topic when omitted)
+    try:
+        topics = parse_topics(request.args.get("topics"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    sub = stream_hub.subscribe(topics)
+    return Response(event_stream(stream_hub, sub), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_bp.route('/feed')
+def get_feed():
+    # Server-Sent Events, keyframe then deltas of enum-coded fields (api/feed.py, static/feed.js)
+    return Response(feed_stream(stream_hub, state_store), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@api_bp.route('/events')
+def get_events():
+    # /events?since=<last id seen>&limit=100&wait=<secs>: door / connection transitions, oldest first
+    # wait: long poll, answer as soon as there is an event after since (at most 30 secs)
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", 100))
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "since and limit must be integers, wait a number"}), 400
+
+    events = event_log.since(since, max(1, min(limit, 1000)), wait)
+    # first > since + 1: older events were dropped from the log
+    return jsonify({"first": event_log.first_id(), "last": event_log.last_id, "events": events})
+
+def parse_since(token, epoch, version):
+    # "<epoch>-<version>" -> version, None when absent, malformed or not a version of this epoch
+    token_epoch, _, token_version = (token or "").rpartition("-")
+    if token_epoch != epoch or not token_version.isdigit() or int(token_version) > version:
+        return None
+    return int(token_version)
+
+@api_bp.route('/state')
+def get_state():
+    # Whole ui_data_dict in one coherent frame, tagged with its epoch and version
+    #   If-None-Match: "<epoch>-<version>" -> 304 when nothing changed
+    #   ?since=<epoch>-<version>           -> only the sections changed after that version
+    #   A token of another epoch (the server restarted) or from the future gets the whole state
+    snapshot = state_store.snapshot()
+    epoch = state_store.epoch
+    since = parse_since(request.args.get("since"), epoch, snapshot.version)
+
+    etag = f"{epoch}-{snapshot.version}"
+    if request.if_none_match.contains(etag) or since == snapshot.version:
+        response = Response(status=304)
+    else:
+        sections = SECTIONS if since is None else snapshot.sections_since(since)
+        response = json_response(snapshot.encode_state(sections, since, epoch))
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@api_bp.route('/devices')
+def get_devices():
+    # Summary and latest frame of every device seen since startup
+    return jsonify({"devices": [device.describe() for device in device_registry.devices()]})
+
+@api_bp.route('/devices/<int:device_id>')
+def get_device(device_id):
+    device = device_registry.get(device_id)
+    if device is None:
+        return jsonify({"status": "error", "message": f"Unknown Device_ID {device_id}"}), 404
+    return jsonify(device.describe())
+
+@api_bp.route('/history')
+def get_history():
+    # Ranging samples of one device
+    #   ?device=<Device_ID>   latest sending device when omitted
+    #   ?from=&to=            timestamps in secs, inclusive
+    #   ?fields=AOA,Distance  subset of fields, timestamp is always returned
+    #   ?format=binary        packed little-endian rows, dtype in the X-History-Dtype header
+    device_id = request.args.get("device", type=int)
+    if device_id is None:
+        device_id = state_store.snapshot().data["Device_ID"]
+    device = device_registry.get(device_id)
+    if device is None:
+        return jsonify({"status": "error", "message": f"Unknown Device_ID {device_id}"}), 404
+
+    fields = request.args.get("fields")
+    fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    try:
+        samples = device.history.query(request.args.get("from", type=float),
+                                       request.args.get("to", type=float),
+                                       fields)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if request.args.get("format") == "binary":
+        response = Response(samples.tobytes(), mimetype="application/octet-stream")
+        response.headers["X-History-Dtype"] = dumps(samples.dtype.descr).decode()
+        response.headers["X-History-Count"] = str(len(samples))
+        return response
+
+    body = {"Device_ID": device_id, "count": len(samples), "fields": list(samples.dtype.names)}
+    body.update(to_columns(samples))
+    return json_response(dumps(body))
+
+@api_bp.route('/record/start', methods=['POST'])
+def start_recording():
+    # {"name": "session.rec"} -> recordings/session.rec, appended when it exists
+    global session_recorder
+    body = request.get_json(silent=True) or {}
+    try:
+        path = recording_path(body.get("name"))
+        recorder = SessionRecorder(path)
+    except (OSError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    previous, session_recorder = session_recorder, recorder
+    if previous is not None:
+        previous.close()
+    return jsonify({"status": "success", "record": recorder.status()})
+
+@api_bp.route('/record/stop', methods=['POST'])
+def stop_recording():
+    global session_recorder
+    recorder, session_recorder = session_recorder, None
+    if recorder is None:
+        return jsonify({"status": "error", "message": "Not recording"}), 409
+    recorder.close()
+    return jsonify({"status": "success", "record": recorder.status()})
+
+@api_bp.route('/record')
+def get_recording():
+    recorder = session_recorder
+    return jsonify({"record": recorder.status() if recorder is not None else None})
+
+def replay_frame(hpc_data_dict, timestamp):
+    ingest_hpc_frame(hpc_data_dict, timestamp, record=False)
+
+@api_bp.route('/replay/start', methods=['POST'])
+def start_replay():
+    # {"name": "session.rec", "speed": 100, "offset": 30}, speed 0 = maximum
+    global session_replayer
+    body = request.get_json(silent=True) or {}
+    try:
+        reader = SessionReader(recording_path(body.get("name")))
+        speed = float(body.get("speed", 1.0))
+        offset = float(body.get("offset", 0.0))
+    except (OSError, TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if session_replayer is not None:
+        session_replayer.stop()
+    replayer = Replayer(reader, replay_frame, speed)
+    replayer.seek(offset)
+    session_replayer = replayer.start()
+    return jsonify({"status": "success", "replay": replayer.status()})
+
+@api_bp.route('/replay/seek', methods=['POST'])
+def seek_replay():
+    # {"offset": secs from the start of the recording}
+    body = request.get_json(silent=True) or {}
+    if session_replayer is None:
+        return jsonify({"status": "error", "message": "No replay"}), 409
+    try:
+        session_replayer.seek(float(body.get("offset", 0.0)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", "replay": session_replayer.status()})
+
+@api_bp.route('/replay/stop', methods=['POST'])
+def stop_replay():
+    if session_replayer is None:
+        return jsonify({"status": "error", "message": "No replay"}), 409
+    session_replayer.stop()
+    return jsonify({"status": "success", "replay": session_replayer.status()})
+
+@api_bp.route('/replay')
+def get_replay():
+    replayer = session_replayer
+    return jsonify({"replay": replayer.status() if replayer is not None else None})
+
+@api_bp.route('/batch', methods=['POST'])
+def post_batch():
+    # [{...hpc_data_dict..., "timestamp": secs}, ...] or {"frames": [...]}, applied in order
+    body = request.get_json(silent=True)
+    frames = body.get("frames") if isinstance(body, dict) else body
+    if not isinstance(frames, list):
+        return jsonify({"status": "error", "message": "Expected an array of frames"}), 400
+
+    # The whole batch is checked first, a bad frame rejects it before anything is applied
+    partial = partial_frames()
+    checked = []
+    for index, frame in enumerate(frames):
+        try:
+            checked.append(hpc_frame_schema.validate(frame, partial))
+        except SchemaError as e:
+            metrics.hpc_frame_errors.inc()
+            error = SchemaError([dict(error, path=f"[{index}].{error['path']}".rstrip(".")) for error in e.errors])
+            return reject_frame(error, applied=0, index=index)
+    frames = checked
+
+    try:
+        applied = ingest_hpc_batch(frames)
+    except BatchError as e:
+        return jsonify({"status": "error", "applied": e.index, "index": e.index, "message": str(e)}), 400
+    return jsonify({"status": "success", "applied": applied}), 200
@@ -0,0 +1,201 @@
+import math
+
+from api.frame_codec import BLE_STATUS, DOORS, UWB_STATUS, VEHICLE_STATUS
+
+
+#Validation of incoming hpc_data_dict (POST /api, POST /api/batch, TCP ingest)
+#   HPC_FRAME_SCHEMA is compiled once into one check per field, validating a frame is a few dict lookups
+#   validate() returns a fresh, normalized frame (status case fixed: "na" -> "NA", ints / floats kept)
+#   or raises SchemaError listing every problem as {"path": "Door.FrontLeft", "message": ...}
+#   Full frames (default):
+#       Connection and Door complete, Ranging complete or null (null / absent: no ranging sample)
+#   Partial frames (partial=True): only what changed
+#       any section may be absent, Connection and Door may carry a subset of their fields,
+#       the rest is kept from the previous frame of the device (api/routes.py complete_frame merges them)
+#       Ranging stays all or nothing, x / y need AOA and Distance of the same sample
+#   Unknown sections and fields are rejected, a typo never passes as "unchanged"
+DOOR_POSITIONS = ("open", "close")
+DOOR_LOCKS = ("lock", "unlock")
+DEVICE_ID_RANGE = (0, 0xFFFF)
+
+# Field kinds of HPC_FRAME_SCHEMA
+NUMBER = "number"
+INTEGER = "integer"
+
+HPC_FRAME_SCHEMA = {
+    "Connection": {
+        "VehicleStatus": VEHICLE_STATUS,
+        "BleStatus": BLE_STATUS,
+        "UwbStatus": UWB_STATUS,
+    },
+    "Door": {door: (DOOR_POSITIONS, DOOR_LOCKS) for door in DOORS},
+    "Ranging": {
+        "FirstPathPower": NUMBER,
+        "AOA": NUMBER,
+        "Distance": NUMBER,
+    },
+    "Device_ID": INTEGER,
+    # Batch frames carry the HPC sample time, secs
+    "timestamp": NUMBER,
+}
+# Sections every full frame carries
+REQUIRED_SECTIONS = ("Connection", "Door")
+# Sections that may be null: no sample in this frame
+NULLABLE_SECTIONS = ("Ranging",)
+
+
+class SchemaError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{error['path']}: {error['message']}" if error["path"] else error["message"]
+                                   for error in errors))
+        # [{"path": ..., "message": ...}, ...]
+        self.errors = errors
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _type_name(value):
+    return "null" if value is None else type(value).__name__
+
+
+def _enum_check(values):
+    # Exact match first, then case-insensitive, always returns the canonical spelling
+    canonical = {value: value for value in values}
+    canonical.update({value.lower(): value for value in values})
+    expected = f"one of {', '.join(values)}"
+
+    def check(value):
+        if not isinstance(value, str):
+            raise _Invalid(f"Expected {expected}, got {value!r}")
+        result = canonical.get(value) or canonical.get(value.lower())
+        if result is None:
+            raise _Invalid(f"Expected {expected}, got {value!r}")
+        return result
+    return check
+
+
+def _number_check(value):
+    # bool is an int subclass, True is not a distance
+    if type(value) not in (int, float):
+        raise _Invalid(f"Expected a number, got {_type_name(value)}")
+    if not math.isfinite(value):
+        raise _Invalid(f"Expected a finite number, got {value!r}")
+    return value
+
+
+def _integer_check(low, high):
+    def check(value):
+        if type(value) is not int:
+            raise _Invalid(f"Expected an integer, got {_type_name(value)}")
+        if not low <= value <= high:
+            raise _Invalid(f"Expected {low}..{high}, got {value}")
+        return value
+    return check
+
+
+def _pair_check(first, second):
+    # ["close", "lock"]
+    check_first, check_second = _enum_check(first), _enum_check(second)
+
+    def check(value):
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise _Invalid(f"Expected [{'|'.join(first)}, {'|'.join(second)}], got {value!r}")
+        return [check_first(value[0]), check_second(value[1])]
+    return check
+
+
+def _compile_field(spec):
+    if spec == NUMBER:
+        return _number_check
+    if spec == INTEGER:
+        return _integer_check(*DEVICE_ID_RANGE)
+    if isinstance(spec, tuple) and len(spec) == 2 and all(isinstance(part, tuple) for part in spec):
+        return _pair_check(*spec)
+    if isinstance(spec, tuple):
+        return _enum_check(spec)
+    raise TypeError(f"Unsupported field spec {spec!r}")
+
+
+class FrameSchema:
+    def __init__(self, schema=HPC_FRAME_SCHEMA, required=REQUIRED_SECTIONS, nullable=NULLABLE_SECTIONS):
+        # section -> {field: check} for object sections, section -> check for scalar ones
+        self.sections = {}
+        self.scalars = {}
+        for name, spec in schema.items():
+            if isinstance(spec, dict):
+                self.sections[name] = {field: _compile_field(field_spec) for field, field_spec in spec.items()}
+            else:
+                self.scalars[name] = _compile_field(spec)
+        self.required = tuple(required)
+        self.nullable = frozenset(nullable)
+
+    def validate(self, data, partial=False) -> dict:
+        """
+        Args:
+            data: Decoded JSON body of one frame
+            partial: Accept missing sections and Connection / Door subsets
+
+        Returns:
+            dict: Normalized copy of data
+
+        Raises:
+            SchemaError: Every problem found in data
+        """
+        if not isinstance(data, dict):
+            raise SchemaError([{"path": "", "message": f"Expected an object, got {_type_name(data)}"}])
+
+        errors = []
+        result = {}
+        for key, value in data.items():
+            fields = self.sections.get(key)
+            if fields is not None:
+                section = self._section(key, fields, value, partial, errors)
+                if section is not None or key in self.nullable:
+                    result[key] = section
+                continue
+            check = self.scalars.get(key)
+            if check is None:
+                errors.append({"path": key, "message": "Unknown field"})
+                continue
+            try:
+                result[key] = check(value)
+            except _Invalid as e:
+                errors.append({"path": key, "message": str(e)})
+
+        if not partial:
+            for key in self.required:
+                if key not in data:
+                    errors.append({"path": key, "message": "Missing section"})
+        if errors:
+            raise SchemaError(errors)
+        return result
+
+    def _section(self, name, fields, value, partial, errors):
+        if value is None and name in self.nullable:
+            return None
+        if not isinstance(value, dict):
+            errors.append({"path": name, "message": f"Expected an object, got {_type_name(value)}"})
+            return None
+
+        section = {}
+        for field, field_value in value.items():
+            check = fields.get(field)
+            if check is None:
+                errors.append({"path": f"{name}.{field}", "message": "Unknown field"})
+                continue
+            try:
+                section[field] = check(field_value)
+            except _Invalid as e:
+                errors.append({"path": f"{name}.{field}", "message": str(e)})
+
+        # Ranging cannot be partial, a full frame no section
+        if len(section) < len(fields) and (not partial or name in self.nullable):
+            for field in fields:
+                if field not in value:
+                    errors.append({"path": f"{name}.{field}", "message": "Missing field"})
+        return section
+
+
+hpc_frame_schema = FrameSchema()
@@ -0,0 +1,262 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+from api.frame_codec import decode_connection, decode_doors, encode_connection, encode_doors
+from api.state import SECTIONS, StateSnapshot, dumps, new_epoch
+
+
+#Live UI frame in a multiprocessing.shared_memory segment, shared by every worker process on the host
+#   Same interface as StateStore (api/state.py): snapshot() / publish(data) -> (snapshot, changed)
+#   Fixed layout, statuses and doors as in api/frame_codec.py:
+#       header  magic       8s      b"HPCSHM02"
+#               sequence    uint64  seqlock, odd while a frame is being written
+#               version     uint64
+#               sections    4 x uint64, version at which Connection / Door / Ranging / User last changed
+#               epoch       4s      random, set when the segment is created: versions restart with a new segment
+#       frame   Device_ID   uint16
+#               Vehicle/Ble/UwbStatus   3 x uint8 enum codes
+#               Door        uint16  door bits
+#               Flags       uint8   bit 0: User has vx / vy (ranging filter on)
+#               FirstPathPower, AOA, Distance, x, y, TurnAngle, vx, vy  float64
+#   Writers: a thread lock plus flock() on a lock file serialize publishers of every process
+#   Readers never lock: read the sequence, copy the frame, read the sequence again, retry when it moved or was odd
+#       A writer killed mid-publish leaves the sequence odd: after READ_TIMEOUT readers take the writer lock,
+#       and if the sequence is still odd nobody is writing, they raise SharedStateError instead of spinning
+#       The next publish rewrites the whole frame and makes the sequence even again
+#   Each process keeps its last decoded snapshot and only rebuilds it (and re-encodes changed sections)
+#   when the shared version moved, so a read of an unchanged frame is one 8-byte read
+#   The segment outlives the processes (a restarted worker re-attaches to the live frame), unlink() removes it
+SHM_MAGIC = b"HPCSHM02"
+SHM_HEADER = struct.Struct("<8sQQ4Q4s")
+SHM_FRAME = struct.Struct("<HBBBHB8d")
+SHM_SIZE = SHM_HEADER.size + SHM_FRAME.size
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+VERSION_OFFSET = 16
+FLAG_VELOCITY = 0x01
+ATTACH_TIMEOUT = 5.0
+# secs, a publish holds the sequence odd for microseconds
+READ_TIMEOUT = 0.1
+WATCH_INTERVAL = 0.01
+
+
+def encode_state(data: dict) -> bytes:
+    ranging, user = data["Ranging"], data["User"]
+    flags = FLAG_VELOCITY if "vx" in user else 0
+    return SHM_FRAME.pack(
+        data.get("Device_ID", 0xFF),
+        *encode_connection(data["Connection"]),
+        encode_doors(data["Door"]),
+        flags,
+        ranging["FirstPathPower"], ranging["AOA"], ranging["Distance"],
+        user["x"], user["y"], user["TurnAngle"], user.get("vx", 0.0), user.get("vy", 0.0),
+    )
+
+
+def decode_state(buffer) -> dict:
+    (device_id, vehicle, ble, uwb, door, flags,
+     first_path_power, aoa, distance, x, y, turn_angle, vx, vy) = SHM_FRAME.unpack(buffer)
+    user = {"x": x, "y": y, "TurnAngle": turn_angle}
+    if flags & FLAG_VELOCITY:
+        user["vx"], user["vy"] = vx, vy
+    return {
+        "Connection": decode_connection(vehicle, ble, uwb),
+        "Door": decode_doors(door),
+        "Ranging": {"FirstPathPower": first_path_power, "AOA": aoa, "Distance": distance},
+        "User": user,
+        "Device_ID": device_id,
+    }
+
+
+class SharedStateStore:
+    def __init__(self, initial: dict, name="hpc_state"):
+        """
+        Attach to the segment called name, create it with the initial frame when it does not exist yet.
+
+        Raises:
+            ValueError: The segment exists with another layout
+            TimeoutError: The segment exists but its creator never initialized it
+        """
+        self.name = name
+        self._write_lock = threading.Lock()
+        self._lock_path = os.path.join("/tmp", f"{name}.lock")
+        self._lock_file = open(self._lock_path, "a+b")
+        # flock() is per open file: a forked worker needs its own, or it would share the parent's lock
+        os.register_at_fork(after_in_child=self._reopen_lock_file)
+        with self._writer():
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=SHM_SIZE)
+                created = True
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=name)
+                created = False
+            # The resource tracker would unlink the segment when this process exits, under the other workers
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+            self._buf = self._shm.buf
+            if created:
+                self._buf[SHM_HEADER.size:SHM_SIZE] = encode_state(initial)
+                SHM_HEADER.pack_into(self._buf, 0, SHM_MAGIC, 0, 0, 0, 0, 0, 0, bytes.fromhex(new_epoch()))
+        if not created:
+            self._wait_initialized()
+        self._epoch = SHM_HEADER.unpack_from(self._buf, 0)[-1]
+        self.epoch = self._epoch.hex()
+        self._snapshot = None
+        self.snapshot()
+
+    def _wait_initialized(self):
+        if self._shm.size < SHM_SIZE:
+            raise ValueError(f"Shared memory segment {self.name} is too small for this version")
+        deadline = time.monotonic() + ATTACH_TIMEOUT
+        while bytes(self._buf[:len(SHM_MAGIC)]) != SHM_MAGIC:
+            if bytes(self._buf[:len(SHM_MAGIC)]).strip(b"\0"):
+                raise ValueError(f"Shared memory segment {self.name} is not a state segment of this version")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Shared memory segment {self.name} was never initialized")
+            time.sleep(0.01)
+
+    def _reopen_lock_file(self):
+        self._write_lock = threading.Lock()
+        self._lock_file = open(self._lock_path, "a+b")
+
+    def _writer(self):
+        return _WriterLock(self._write_lock, self._lock_file)
+
+    def _read(self, timeout=READ_TIMEOUT):
+        """
+        Returns:
+            tuple: (version, section versions, frame bytes), consistent thanks to the seqlock
+
+        Raises:
+            SharedStateError: A writer died mid-publish, no consistent frame until the next publish
+        """
+        buf = self._buf
+        deadline = None
+        while True:
+            sequence = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+            if not sequence & 1:
+                header = SHM_HEADER.unpack_from(buf, 0)
+                frame = bytes(buf[SHM_HEADER.size:SHM_SIZE])
+                if SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0] == sequence:
+                    return header[2], dict(zip(SECTIONS, header[3:7])), frame
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                self._check_writer()
+                # A live writer was only slow, try again
+                deadline = None
+            time.sleep(0)
+
+    def _check_writer(self):
+        # Holding the writer lock proves nobody is writing, flock() is released when a process dies
+        with self._writer():
+            if SEQUENCE.unpack_from(self._buf, SEQUENCE_OFFSET)[0] & 1:
+                raise SharedStateError(f"Shared state {self.name}: a writer died mid-publish, "
+                                       f"no consistent frame until the next publish")
+
+    def version(self):
+        return SEQUENCE.unpack_from(self._buf, VERSION_OFFSET)[0]
+
+    def snapshot(self) -> StateSnapshot:
+        current = self._snapshot
+        if current is not None and self.version() == current.version:
+            return current
+
+        version, section_versions, frame = self._read()
+        data = decode_state(frame)
+        if current is None:
+            encoded = {section: dumps(data[section]) for section in SECTIONS}
+        else:
+            encoded = {section: current.encoded[section] if section_versions[section] <= current.version
+                       else dumps(data[section]) for section in SECTIONS}
+        snapshot = StateSnapshot(version, data, section_versions, encoded)
+        # Another reader thread may have rebuilt a newer one meanwhile, keep the newest
+        if self._snapshot is None or self._snapshot.version <= version:
+            self._snapshot = snapshot
+        return snapshot
+
+    def publish(self, data: dict):
+        """
+        Publish a new frame for every process if any section or the Device_ID changed.
+
+        Returns:
+            tuple: (current snapshot, list of changed sections), see StateStore.publish
+        """
+        frame = encode_state(data)
+        with self._writer():
+            sequence = SEQUENCE.unpack_from(self._buf, SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                # The last writer died mid-publish (we hold the lock): its frame may be torn, rewrite all of it
+                sequence += 1
+                version = SEQUENCE.unpack_from(self._buf, VERSION_OFFSET)[0] + 1
+                changed = list(SECTIONS)
+                section_versions = {section: version for section in SECTIONS}
+            else:
+                current = self.snapshot()
+                # Compare what readers would decode, not the frame as built (e.g. unknown statuses)
+                new_data = decode_state(frame)
+                changed = [section for section in SECTIONS if new_data[section] != current.data[section]]
+                if not changed and new_data["Device_ID"] == current.data["Device_ID"]:
+                    return current, changed
+
+                version = current.version + 1
+                section_versions = dict(current.section_versions)
+                for section in changed:
+                    section_versions[section] = version
+            SEQUENCE.pack_into(self._buf, SEQUENCE_OFFSET, sequence + 1)
+            self._buf[SHM_HEADER.size:SHM_SIZE] = frame
+            SHM_HEADER.pack_into(self._buf, 0, SHM_MAGIC, sequence + 1, version,
+                                 *(section_versions[section] for section in SECTIONS), self._epoch)
+            SEQUENCE.pack_into(self._buf, SEQUENCE_OFFSET, sequence + 2)
+            return self.snapshot(), changed
+
+    def watch(self, callback, interval=WATCH_INTERVAL):
+        """
+        Call callback(snapshot, changed sections) whenever any process publishes, from a daemon thread.
+        changed is empty when only the Device_ID changed.
+        Lets every worker feed its own /stream subscribers.
+        """
+        def run():
+            seen = self.snapshot().version
+            while True:
+                time.sleep(interval)
+                if self.version() == seen:
+                    continue
+                snapshot = self.snapshot()
+                changed = snapshot.sections_since(seen)
+                seen = snapshot.version
+                callback(snapshot, changed)
+
+        thread = threading.Thread(target=run, name=f"{self.name}-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self):
+        shared_memory.SharedMemory(name=self.name).unlink()
+
+
+class SharedStateError(RuntimeError):
+    pass
+
+
+class _WriterLock:
+    # Threads of this process, then other processes
+    def __init__(self, lock, lock_file):
+        self.lock = lock
+        self.lock_file = lock_file
+
+    def __enter__(self):
+        self.lock.acquire()
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.lock.release()
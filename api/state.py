@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+
+try:
+    # Optional, several times faster than the json module
+    import orjson
+except ImportError:
+    orjson = None
+
+
+#Double-buffered UI state
+#   The ingest path builds every new frame off to the side (a fresh dict, never shared with the HPC payload)
+#   then publishes it with a single reference assignment, which is atomic in CPython
+#   Readers call snapshot() without any lock and always get one whole frame:
+#       never new User.x next to an old TurnAngle
+#   A published snapshot is read-only: nobody mutates its data after publish
+#
+#Pre-encoded JSON
+#   Every section is encoded once when it changes, unchanged sections reuse the bytes of the previous snapshot
+#   The bytes live in the snapshot itself, so they are always those of snapshot.version:
+#       a new version is a new snapshot, the cache can never be stale
+#
+#Epoch
+#   Versions restart at 0 with the process, store.epoch (random per store) tells the counters apart:
+#   /api/state tags its ETag and since tokens with it, a token of another epoch never means "unchanged"
+SECTIONS = ("Connection", "Door", "Ranging", "User")
+
+
+def new_epoch() -> str:
+    return os.urandom(4).hex()
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class StateSnapshot:
+    __slots__ = ("version", "data", "section_versions", "encoded")
+
+    def __init__(self, version, data, section_versions, encoded):
+        self.version = version
+        # {"Connection": ..., "Door": ..., "Ranging": ..., "User": ..., "Device_ID": ...}
+        self.data = data
+        # section -> version at which it last changed
+        self.section_versions = section_versions
+        # section -> JSON bytes of data[section]
+        self.encoded = encoded
+
+    def sections_since(self, version):
+        return [section for section in SECTIONS if self.section_versions[section] > version]
+
+    def encode_state(self, sections=SECTIONS, since=None, epoch=None) -> bytes:
+        # {"version":..,"state":{..}} assembled from the cached section bytes, nothing is re-encoded
+        body = b",".join(b'"%s":%s' % (section.encode(), self.encoded[section]) for section in sections)
+        head = b'{"version":%d,' % self.version
+        if epoch is not None:
+            head += b'"epoch":"%s",' % epoch.encode()
+        if since is not None:
+            head += b'"since":%d,' % since
+        return head + b'"state":{' + body + b"}}"
+
+
+class StateStore:
+    def __init__(self, initial: dict):
+        encoded = {section: dumps(initial[section]) for section in SECTIONS}
+        self._snapshot = StateSnapshot(0, initial, {section: 0 for section in SECTIONS}, encoded)
+        # Only serializes writers, readers never take it
+        self._write_lock = threading.Lock()
+        self.epoch = new_epoch()
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
+
+    def publish(self, data: dict):
+        """
+        Publish a new frame if any section or the Device_ID changed.
+
+        Args:
+            data: Freshly built frame, owned by the store from now on
+
+        Returns:
+            tuple: (current snapshot, list of changed sections), a new snapshot with no changed sections
+                   when only the Device_ID changed
+        """
+        with self._write_lock:
+            current = self._snapshot
+            changed = [section for section in SECTIONS if data[section] != current.data[section]]
+            if not changed and data.get("Device_ID") == current.data.get("Device_ID"):
+                return current, changed
+
+            version = current.version + 1
+            section_versions = dict(current.section_versions)
+            encoded = dict(current.encoded)
+            for section in changed:
+                section_versions[section] = version
+                encoded[section] = dumps(data[section])
+            self._snapshot = StateSnapshot(version, data, section_versions, encoded)
+            return self._snapshot, changed
@@ -0,0 +1,141 @@
+import threading
+from collections import deque
+
+
+#Server-Sent Events fan-out
+#   convert_hpc2ui publishes each new frame to the hub with the topics that changed
+#   The hub only pushes those topics to the tabs that subscribed to them
+#   Every subscriber (one browser tab) owns a bounded queue:
+#       When the tab is too slow the oldest frames are dropped, the hub never waits for a reader
+TOPICS = ("Connection", "Door", "Ranging", "User")
+# Not a section: published when the dashboard switches to another device with identical sections
+DEVICE_TOPIC = "Device_ID"
+
+SUBSCRIBER_QUEUE_SIZE = 16
+KEEPALIVE_SECS = 15
+
+
+class Subscription:
+    def __init__(self, topics, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.topics = frozenset(topics)
+        self.dropped = 0
+        self._frames = deque(maxlen=queue_size)
+        self._ready = threading.Condition()
+
+    def put(self, frame):
+        with self._ready:
+            if len(self._frames) == self._frames.maxlen:
+                self._drop_stale()
+            self._frames.append(frame)
+            self._ready.notify()
+
+    def _drop_stale(self):
+        # Drop the oldest frame that a newer frame of the same topic supersedes,
+        # so the last Door/Connection state always reaches the tab
+        pending = {}
+        for topic, _ in self._frames:
+            pending[topic] = pending.get(topic, 0) + 1
+        for i, (topic, _) in enumerate(self._frames):
+            if pending[topic] > 1:
+                del self._frames[i]
+                self.dropped += 1
+                return
+        self._frames.popleft()
+        self.dropped += 1
+
+    def get(self, timeout=None):
+        # Return every pending frame, or an empty list when the timeout expires
+        with self._ready:
+            if not self._frames:
+                self._ready.wait(timeout)
+            frames = list(self._frames)
+            self._frames.clear()
+        return frames
+
+
+class StreamHub:
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        # topic -> last formatted event
+        self._last = {}
+
+    def subscribe(self, topics=TOPICS):
+        sub = Subscription(topics, self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+            # Replay the current state so a new tab does not wait for the next change
+            for topic in TOPICS:
+                if topic in sub.topics and topic in self._last:
+                    sub.put((topic, self._last[topic]))
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, encoded: dict, topics=TOPICS):
+        """
+        Push the given topics of a newly published frame.
+
+        Args:
+            encoded: topic -> JSON bytes, the cached encoding of a StateSnapshot
+            topics: Topics that changed in this frame (api.state.StateStore.publish reports them)
+        """
+        # Formatted once, shared by every subscriber
+        frames = [(topic, format_event(topic, encoded[topic])) for topic in topics]
+        with self._lock:
+            for topic, event in frames:
+                self._last[topic] = event
+            subscribers = list(self._subscribers)
+
+        for frame in frames:
+            for sub in subscribers:
+                if frame[0] in sub.topics:
+                    sub.put(frame)
+
+    def publish_device(self, device_id):
+        frame = (DEVICE_TOPIC, format_event(DEVICE_TOPIC, b"%d" % device_id))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if DEVICE_TOPIC in sub.topics:
+                sub.put(frame)
+
+
+def parse_topics(raw):
+    # "Connection,Door" -> ("Connection", "Door"); None / "" -> every topic
+    if not raw:
+        return TOPICS
+    topics = tuple(t.strip() for t in raw.split(",") if t.strip())
+    unknown = [t for t in topics if t not in TOPICS]
+    if unknown:
+        raise ValueError(f"Unknown topic(s): {', '.join(unknown)}. Valid topics: {', '.join(TOPICS)}")
+    return topics
+
+
+def format_event(topic, payload: bytes) -> bytes:
+    return b"event: %s\ndata: %s\n\n" % (topic.encode(), payload)
+
+
+def event_payload(event: bytes) -> bytes:
+    # format_event(topic, payload) -> payload
+    return event[event.index(b"\ndata: ") + 7:-2]
+
+
+def event_stream(hub: StreamHub, sub: Subscription, keepalive=KEEPALIVE_SECS):
+    try:
+        while True:
+            frames = sub.get(timeout=keepalive)
+            if not frames:
+                # Comment line, keeps proxies from closing an idle stream and detects closed tabs
+                yield b": keepalive\n\n"
+                continue
+            yield b"".join(event for _, event in frames)
+    finally:
+        hub.unsubscribe(sub)
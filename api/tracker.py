@@ -0,0 +1,82 @@
+import math
+
+
+#Trajectory of one device
+#   Fixed-size ring of the last positions, nothing is shared between instances:
+#       one tracker per device (or per thread) is safe without any lock
+#   Heading uses atan2 of the movement since the last accepted position
+#   Movements shorter than the jitter threshold do not turn the user
+TRACKER_CAPACITY = 8
+JITTER_CM = 5.0
+
+
+class TrajectoryTracker:
+    __slots__ = ("capacity", "jitter", "heading", "speed", "_xs", "_ys", "_ts", "_head", "_count")
+
+    def __init__(self, capacity=TRACKER_CAPACITY, jitter=JITTER_CM):
+        self.capacity = capacity
+        self.jitter = jitter
+        self.heading = None
+        # cm/s over the positions held in the ring
+        self.speed = 0.0
+        self._xs = [0.0] * capacity
+        self._ys = [0.0] * capacity
+        self._ts = [0.0] * capacity
+        # Index of the newest position
+        self._head = -1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def last_position(self):
+        if self._count == 0:
+            return None
+        return self._xs[self._head], self._ys[self._head]
+
+    def update(self, x, y, timestamp):
+        """
+        Add a position and return the heading (rad, TurnAngle convention).
+
+        Args:
+            x, y: Position (cm)
+            timestamp: Sample time (secs)
+        """
+        if self._count == 0:
+            # First position: the user faces (0,0)
+            self.heading = math.atan2(y, x) - math.pi
+            self._push(x, y, timestamp)
+            return self.heading
+
+        dx = x - self._xs[self._head]
+        dy = y - self._ys[self._head]
+        if math.hypot(dx, dy) < self.jitter:
+            # Standing still: keep heading and anchor position, only age the speed
+            self._update_speed(x, y, timestamp)
+            return self.heading
+
+        self.heading = math.atan2(dy, dx)
+        self._push(x, y, timestamp)
+        return self.heading
+
+    def _push(self, x, y, timestamp):
+        self._head = (self._head + 1) % self.capacity
+        self._xs[self._head] = x
+        self._ys[self._head] = y
+        self._ts[self._head] = timestamp
+        if self._count < self.capacity:
+            self._count += 1
+        self._update_speed(x, y, timestamp)
+
+    def _update_speed(self, x, y, timestamp):
+        oldest = (self._head - self._count + 1) % self.capacity
+        dt = timestamp - self._ts[oldest]
+        if dt <= 0:
+            return
+        self.speed = math.hypot(x - self._xs[oldest], y - self._ys[oldest]) / dt
+
+    def reset(self):
+        self.heading = None
+        self.speed = 0.0
+        self._head = -1
+        self._count = 0
@@ -1,26 +1,143 @@
+import os
+
+# gevent has to patch the standard library before anything creates a lock, a thread or a socket
+if os.environ.get("HPC_SERVER") == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
 from flask import Flask, render_template
+import argparse
 import logging
 
-from api.routes import api_bp
+from api import assets, metrics
+from api.ingest_server import IngestServer
+from api.log import log_fields, setup_logging
+from api.routes import api_bp, validate_and_ingest, TCP_HPC_PORT
 
 
 HOST = "0.0.0.0"
 PORT = 80
 
+#Production serving (python app.py --production), debug and reloader are always off
+#   --server  auto     waitress when installed, else gevent when HPC_SERVER=gevent, else threaded
+#             waitress multi-threaded WSGI server, --workers threads (each open /stream holds one)
+#             gevent   greenlet server, --workers concurrent connections, start with HPC_SERVER=gevent
+#             threaded Werkzeug server, one thread per request, --workers is rejected
+#   Every option can also come from the environment: HPC_HOST, HPC_PORT, HPC_WORKERS, HPC_SERVER
+#   One process serves everything unless HPC_STATE_BACKEND=shm (api/shm_state.py), e.g. gunicorn -w 4 'app:create_app()'
+#   Other WSGI servers load the factory: waitress-serve --call app:create_app
+#   TCP ingest (TCP_HPC_PORT) is started by main(), external servers never call it:
+#       HPC_TCP_INGEST=1 makes create_app() start it instead, in the first process that binds the port
+#       With several workers (no --preload) only that one ingests TCP frames, HPC_STATE_BACKEND=shm
+#       shares them with the others
+SERVERS = ("auto", "waitress", "gevent", "threaded")
+WORKERS = 32
+TCP_INGEST = os.environ.get("HPC_TCP_INGEST", "0").lower() in ("1", "true", "yes")
+
 # disable logging
 # log = logging.getLogger('werkzeug')
 # log.setLevel(logging.ERROR)
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
 
-# web client
-@app.route('/')
-def index():
-    return render_template('index_icon.html')
+# One per process, create_app() may run more than once (module import, then the server's factory call)
+ingest_server = None
+
+def start_ingest_server(host):
+    global ingest_server
+    if ingest_server is None:
+        ingest_server = IngestServer(validate_and_ingest, host, TCP_HPC_PORT).start()
+    return ingest_server
+
+
+def create_app():
+    # External servers (gunicorn 'app:create_app()', waitress-serve --call) only call the factory
+    setup_logging()
+    app = Flask(__name__, template_folder='templates', static_folder='static')
+
+    # web client
+    @app.route('/')
+    def index():
+        return render_template('index_icon.html')
+
+    #app.register_blueprint(dkms_v1_bp, url_prefix='/service/v1')
+    app.register_blueprint(api_bp, url_prefix='/api')
+    # Prometheus scrape endpoint and per-route request metrics
+    metrics.init_app(app)
+    # Fingerprinted, precompressed static/dist (python -m api.assets), asset_url() in templates
+    assets.init_app(app)
+    if TCP_INGEST:
+        start_ingest_server(os.environ.get("HPC_HOST", HOST))
+    return app
+
+app = create_app()
+
+
+def resolve_server(server):
+    if server != "auto":
+        return server
+    try:
+        import waitress  # noqa: F401
+        return "waitress"
+    except ImportError:
+        pass
+    if os.environ.get("HPC_SERVER") == "gevent":
+        return "gevent"
+    return "threaded"
+
+
+def serve(app, host, port, workers, server):
+    server = resolve_server(server)
+    if server == "gevent" and os.environ.get("HPC_SERVER") != "gevent":
+        raise SystemExit("The gevent server needs the standard library patched at startup, run with HPC_SERVER=gevent")
+    if server == "threaded":
+        # One thread per request, nothing to size
+        workers = None
+    logging.getLogger(__name__).info("Serving", extra=log_fields(server=server, host=host, port=port, workers=workers))
+    if server == "waitress":
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            raise SystemExit("waitress is not installed: pip install waitress, or --server threaded")
+        waitress_serve(app, host=host, port=port, threads=workers)
+    elif server == "gevent":
+        from gevent.pool import Pool
+        from gevent.pywsgi import WSGIServer
+        WSGIServer((host, port), app, spawn=Pool(workers), log=None).serve_forever()
+    else:
+        from werkzeug.serving import run_simple
+        run_simple(host, port, app, threaded=True, use_reloader=False, use_debugger=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HPC dashboard server, development server unless --production")
+    parser.add_argument("--production", action="store_true", help="Production server, no debugger and no reloader")
+    parser.add_argument("--host", default=os.environ.get("HPC_HOST", HOST))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("HPC_PORT", PORT)))
+    parser.add_argument("--workers", type=int, default=os.environ.get("HPC_WORKERS"),
+                        help=f"Threads (waitress) or concurrent connections (gevent), default {WORKERS}, "
+                             "not for the threaded server")
+    parser.add_argument("--server", choices=SERVERS, default=os.environ.get("HPC_SERVER", "auto"))
+    args = parser.parse_args()
+    if args.server not in SERVERS:
+        parser.error(f"HPC_SERVER must be one of {', '.join(SERVERS)}")
+    if args.workers is not None and args.production and resolve_server(args.server) == "threaded":
+        parser.error("--workers / HPC_WORKERS does not apply to the threaded server (one thread per request), "
+                     "use --server waitress or gevent")
+    workers = WORKERS if args.workers is None else args.workers
+
+    # Request threads only enqueue log records, see api/log.py
+    setup_logging()
+
+    if args.production:
+        start_ingest_server(args.host)
+        serve(app, args.host, args.port, workers, args.server)
+        return
+
+    # The reloader runs this file twice, only the serving child binds the HPC ingest port
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_ingest_server(args.host)
+    app.run(host=args.host, port=args.port, debug=True, use_reloader=True)
 
-#app.register_blueprint(dkms_v1_bp, url_prefix='/service/v1')
-app.register_blueprint(api_bp, url_prefix='/api')
 
-   
 if __name__ == "__main__":
-    app.run(host=HOST, port=PORT, debug=True, use_reloader=True)
+    main()
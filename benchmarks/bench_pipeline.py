@@ -0,0 +1,272 @@
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from api import routes, state
+from api.filters import RANGING_FILTER_CONFIG, RangingFilter
+from api.tracker import TrajectoryTracker
+from client_set_connection import build_hpc_frame, generate_ranging_batch
+
+
+#Ingest-to-read pipeline benchmarks
+#   python -m benchmarks.bench_pipeline [--quick] [--output bench.json]
+#   Micro   : convert_hpc2ui, get_xy, TrajectoryTracker.update (heading, formerly getTurnAngle), RangingFilter.update
+#   Flask   : post_data and every GET route through the test client, GET routes with concurrent readers
+#   Server  : same GET routes against a local threaded server, POST -> /stream end-to-end latency
+#             (latency only: frames coalesced by the tick publisher never reach /stream, see sent / observed)
+#   Results are printed and written as JSON (one object per benchmark) to compare commits,
+#   with the settings that change them: HPC_PUBLISH_RATE, ranging filter type, orjson
+GET_ROUTES = ("/api/connection", "/api/door", "/api/ranging", "/api/user", "/api/state")
+
+
+def make_frames(count, seed=1):
+    ranging = generate_ranging_batch(count, 1, seed=seed)
+    return [build_hpc_frame("Awake", "Connected", "Ranging",
+                            ranging_data={"FirstPathPower": float(ranging["FirstPathPower"][0, i]),
+                                          "AOA": float(ranging["AOA"][0, i]),
+                                          "Distance": float(ranging["Distance"][0, i])},
+                            device_id=1)
+            for i in range(count)]
+
+
+def summarize(samples, elapsed=None, operations=None):
+    samples = np.asarray(samples, dtype=float)
+    if elapsed is None:
+        elapsed = float(samples.sum())
+    if operations is None:
+        operations = len(samples)
+    p50, p99 = np.percentile(samples, [50, 99]) if len(samples) else (0.0, 0.0)
+    return {
+        "n": operations,
+        "ops_per_sec": operations / elapsed if elapsed > 0 else 0.0,
+        "mean_us": float(samples.mean()) * 1e6 if len(samples) else 0.0,
+        "p50_us": float(p50) * 1e6,
+        "p99_us": float(p99) * 1e6,
+    }
+
+
+def summarize_latency(samples, sent):
+    # Percentiles of the samples that were observed, no throughput: not every sent frame is
+    samples = np.asarray(samples, dtype=float)
+    p50, p99 = np.percentile(samples, [50, 99]) if len(samples) else (0.0, 0.0)
+    return {
+        "sent": sent,
+        "observed": len(samples),
+        "mean_us": float(samples.mean()) * 1e6 if len(samples) else 0.0,
+        "p50_us": float(p50) * 1e6,
+        "p99_us": float(p99) * 1e6,
+    }
+
+
+def measure(fn, n, warmup=50):
+    for i in range(warmup):
+        fn(i)
+    samples = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - start
+    return summarize(samples)
+
+
+def measure_concurrent(make_worker, readers, n):
+    # make_worker() -> fn(i), one per thread; every thread runs n calls
+    samples = [None] * readers
+    barrier = threading.Barrier(readers + 1)
+
+    def run(index):
+        fn = make_worker()
+        local = np.empty(n)
+        barrier.wait()
+        for i in range(n):
+            start = time.perf_counter()
+            fn(i)
+            local[i] = time.perf_counter() - start
+        samples[index] = local
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(readers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    result = summarize(np.concatenate(samples), elapsed, readers * n)
+    result["readers"] = readers
+    return result
+
+
+def bench_micro(results, frames, n):
+    device = routes.device_registry.get_or_create(1)
+    results["convert_hpc2ui"] = measure(lambda i: routes.convert_hpc2ui(frames[i % len(frames)], device), n)
+    results["get_xy"] = measure(lambda i: routes.get_xy(frames[i % len(frames)]), n)
+
+    tracker = TrajectoryTracker()
+    positions = [routes.get_xy(frame) for frame in frames]
+    results["trajectory_update"] = measure(lambda i: tracker.update(*positions[i % len(positions)], i * 0.01), n)
+
+    ranging_filter = RangingFilter()
+    results["ranging_filter_update"] = measure(
+        lambda i: ranging_filter.update(*positions[i % len(positions)],
+                                        frames[i % len(frames)]["Ranging"]["Distance"],
+                                        frames[i % len(frames)]["Ranging"]["FirstPathPower"], i * 0.01), n)
+
+
+def bench_flask(results, frames, n, readers):
+    client = app.test_client()
+    results["post_data"] = measure(lambda i: client.post("/api/", json=frames[i % len(frames)]), n)
+
+    for route in GET_ROUTES:
+        results[f"get {route}"] = measure(lambda i: client.get(route), n)
+        results[f"get {route} x{readers}"] = measure_concurrent(
+            lambda: (lambda c: (lambda i: c.get(route)))(app.test_client()), readers, max(1, n // readers))
+
+
+class LocalServer:
+    def __init__(self):
+        from werkzeug.serving import make_server
+        # One access log line per request would dominate the measurements
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.port = self.server.port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+def http_get(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+
+    def get(route):
+        connection.request("GET", route)
+        response = connection.getresponse()
+        response.read()
+        if response.will_close:
+            connection.close()
+    return get
+
+
+def bench_server(results, frames, n, readers):
+    with LocalServer() as server:
+        for route in GET_ROUTES:
+            results[f"server get {route} x{readers}"] = measure_concurrent(
+                lambda: (lambda get: (lambda i: get(route)))(http_get(server.port)), readers, max(1, n // readers))
+        results["server post_to_stream"] = bench_end_to_end(server.port, frames, max(10, n // 20))
+
+
+def bench_end_to_end(port, frames, count):
+    # Time between sending a POST and a /stream reader receiving the new Ranging section
+    # The tick publisher coalesces frames sent within one tick, only the latest reaches /stream,
+    # the last frame always does
+    sent = {}
+    latencies = []
+    done = threading.Event()
+    connected = threading.Event()
+
+    def read_stream():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request("GET", "/api/stream?topics=Ranging")
+        response = connection.getresponse()
+        connected.set()
+        while not done.is_set():
+            line = response.fp.readline()
+            if not line:
+                break
+            if line.startswith(b"data:"):
+                distance = json.loads(line[5:])["Distance"]
+                if distance in sent:
+                    latencies.append(time.perf_counter() - sent.pop(distance))
+                    if distance == last:
+                        done.set()
+        connection.close()
+
+    last = 100000.0 + count - 1
+    reader = threading.Thread(target=read_stream, daemon=True)
+    reader.start()
+    connected.wait(5)
+    time.sleep(0.1)
+
+    post = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    for i in range(count):
+        frame = dict(frames[i % len(frames)])
+        frame["Ranging"] = dict(frame["Ranging"], Distance=100000.0 + i)
+        body = json.dumps(frame)
+        sent[frame["Ranging"]["Distance"]] = time.perf_counter()
+        post.request("POST", "/api/", body, {"Content-Type": "application/json"})
+        response = post.getresponse()
+        response.read()
+        if response.will_close:
+            post.close()
+        time.sleep(0.005)
+    done.wait(5)
+    done.set()
+    return summarize_latency(latencies, count)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HPC ingest to UI read pipeline")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a smoke run")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent readers for the GET benchmarks")
+    parser.add_argument("--skip-server", action="store_true", help="Only run the in-process benchmarks")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    n = 200 if args.quick else 5000
+    frames = make_frames(1000)
+    results = {}
+
+    bench_micro(results, frames, n * 4)
+    bench_flask(results, frames, n, args.readers)
+    if not args.skip_server:
+        bench_server(results, frames, n, args.readers)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "publish_rate_hz": routes.PUBLISH_RATE_HZ,
+            "ranging_filter": RANGING_FILTER_CONFIG["type"],
+            "orjson": state.orjson is not None,
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        if "ops_per_sec" in result:
+            rate = f"{result['ops_per_sec']:>12.0f} ops/s"
+        else:
+            rate = f"{result['observed']:>5}/{result['sent']:<5} observed"
+        print(f"{name:<40} {rate}  p50 {result['p50_us']:>9.1f} us  p99 {result['p99_us']:>9.1f} us")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,32 @@ import random
 import math
 import numpy as np
 import time
+import argparse
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+from api.frame_codec import FRAME_CONTENT_TYPE, encode_frame
+from api.log import log_fields, setup_logging, should_log
 
 # SERVER_URL = 'http://127.0.0.1/api'
 # SERVER_URL = 'http://10.102.50.15/api'
 SERVER_URL = 'http://192.168.8.10/api/'
 
+# Per-frame output is sampled, see api/log.py (HPC_FRAME_LOGGING=0 silences it)
+logger = logging.getLogger("simulator")
+
   
 class PositionGenerator:
-    def __init__(self, rect_corners=((-1.5, 2.5), (1.5, -2.5)), max_radius=10):
+    def __init__(self, rect_corners=((-1.5, 2.5), (1.5, -2.5)), max_radius=10, seed=None):
         """
         Initialize the position generator.
         
         Args:
             rect_corners: Tuple of diagonal corners ((x1, y1), (x2, y2))
             max_radius: Maximum distance from rectangle center
+            seed: Seed of the random generators, same seed = same trajectory
         """
         # Extract rectangle corners
         (x1, y1), (x2, y2) = rect_corners
@@ -37,6 +49,10 @@ class PositionGenerator:
         # Maximum radius
         self.max_radius = max_radius
         
+        # Random generators: scalar steps use rng, batches use np_rng
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        
         # Initialize current position
         # initial_angle = random.uniform(0, 2 * math.pi)
         # initial_distance = self.half_diagonal + random.uniform(10, 50)
@@ -50,7 +66,17 @@ class PositionGenerator:
         # Parameters for gradual changes
         self.distance_step_range = (0.25, 0.5)  # Range for distance changes
         self.angle_step_range = (0.1, 6)   # Range for angle changes in degrees
+
+        # Batch position of each device, (distance, angle_degrees) arrays, set by generate_batch
+        self.batch_distance = None
+        self.batch_angle = None
         
+    def is_inside_rectangle(self, distance, angle_deg):
+        angle_rad = math.radians(angle_deg)
+        x = self.center_x + distance * math.cos(angle_rad)
+        y = self.center_y + distance * math.sin(angle_rad)
+        return self.x_min <= x <= self.x_max and self.y_min <= y <= self.y_max
+
     def get_next_position(self):
         """
         Generate the next position data with gradual changes.
@@ -58,60 +84,122 @@ class PositionGenerator:
         Returns:
             List [distance, angle_degrees]
         """
-        # Randomly decide whether to increase or decrease
-        distance_direction = random.choice([-1, 1])
-        # angle_direction = random.choice([-1, 1])
-        angle_direction = 1
+        # Draw new steps until the position falls outside the rectangle (loop, no recursion)
+        while True:
+            # Randomly decide whether to increase or decrease
+            distance_direction = self.rng.choice([-1, 1])
+            # angle_direction = random.choice([-1, 1])
+            angle_direction = 1
+            
+            # Generate random step sizes within the defined ranges
+            distance_step = self.rng.uniform(*self.distance_step_range)
+            angle_step = self.rng.uniform(*self.angle_step_range)
+            
+            # Update distance with bounds checking
+            new_distance = self.current_distance + (distance_direction * distance_step)
+            
+            # Ensure distance stays within bounds (half_diagonal to max_radius)
+            new_distance = max(self.half_diagonal, min(new_distance, self.max_radius))
+            
+            # Update angle (in degrees) and normalize to 0-360 range
+            new_angle_deg = (self.current_angle_deg + (angle_direction * angle_step)) % 360
+            
+            # Check if the new position is inside the rectangle
+            if not self.is_inside_rectangle(new_distance, new_angle_deg):
+                break
         
-        # Generate random step sizes within the defined ranges
-        distance_step = random.uniform(*self.distance_step_range)
-        angle_step = random.uniform(*self.angle_step_range)
+        # Update current position
+        self.current_distance = new_distance
+        self.current_angle_rad = math.radians(new_angle_deg)
+        self.current_angle_deg = new_angle_deg
         
-        # Update distance with bounds checking
-        new_distance = self.current_distance + (distance_direction * distance_step)
+        # Return [distance, angle_degrees]
+        return [self.current_distance * 100, self.current_angle_deg]
+
+    def generate_batch(self, steps, devices=1):
+        """
+        Generate steps positions for devices independent devices at once, as NumPy arrays.
+        Each device continues from where the previous batch left it, successive batches are one trajectory.
+        On its first batch device 0 starts from the current position, the others from a random one,
+        and the current position follows device 0.
         
-        # Ensure distance stays within bounds (half_diagonal to max_radius)
-        new_distance = max(self.half_diagonal, min(new_distance, self.max_radius))
+        Distance is a random walk reflected between half_diagonal and max_radius:
+        a point at least half_diagonal away from the center is never inside the rectangle,
+        so no sample has to be rejected.
         
-        # Update angle (in degrees)
-        new_angle_deg = self.current_angle_deg + (angle_direction * angle_step)
+        Args:
+            steps: Samples per device
+            devices: Number of devices
         
-        # Normalize angle to 0-360 range
-        new_angle_deg = new_angle_deg % 360
+        Returns:
+            tuple: (distance_cm, angle_degrees), arrays of shape (devices, steps)
+        """
+        low, high = self.half_diagonal, self.max_radius
+        shape = (devices, steps)
         
-        # Convert angle to radians for position calculation
-        new_angle_rad = math.radians(new_angle_deg)
+        start_distance, start_angle = self.batch_start(devices)
         
-        # Calculate new position
-        new_x = self.center_x + new_distance * math.cos(new_angle_rad)
-        new_y = self.center_y + new_distance * math.sin(new_angle_rad)
+        # Distance: cumulative +/- steps, folded back into [low, high]
+        distance_steps = self.np_rng.uniform(*self.distance_step_range, size=shape)
+        distance_steps *= self.np_rng.choice((-1.0, 1.0), size=shape)
+        distance = reflect(start_distance[:, None] + np.cumsum(distance_steps, axis=1), low, high)
         
-        # Check if the new position is inside the rectangle
-        if self.x_min <= new_x <= self.x_max and self.y_min <= new_y <= self.y_max:
-            # If inside, revert to previous position and try again
-            return self.get_next_position()
+        # Angle: always increasing, normalized to 0-360 range
+        angle_steps = self.np_rng.uniform(*self.angle_step_range, size=shape)
+        angle = (start_angle[:, None] + np.cumsum(angle_steps, axis=1)) % 360
         
-        # Update current position
-        self.current_distance = new_distance
-        self.current_angle_rad = new_angle_rad
-        self.current_angle_deg = new_angle_deg
+        if steps:
+            # The next batch starts from the last column
+            self.batch_distance[:devices] = distance[:, -1]
+            self.batch_angle[:devices] = angle[:, -1]
+            self.current_distance = float(distance[0, -1])
+            self.current_angle_deg = float(angle[0, -1])
+            self.current_angle_rad = math.radians(self.current_angle_deg)
         
-        # Return [distance, angle_degrees]
-        return [self.current_distance * 100, self.current_angle_deg]
+        return distance * 100, angle
+    
+    def batch_start(self, devices):
+        # (distance, angle_degrees) arrays of the first devices, devices never seen before get their start
+        low, high = self.half_diagonal, self.max_radius
+        known = 0 if self.batch_distance is None else len(self.batch_distance)
+        if known < devices:
+            distance = self.np_rng.uniform(low, high, size=devices - known)
+            angle = self.np_rng.uniform(0, 360, size=devices - known)
+            if known == 0:
+                distance[0] = min(max(self.current_distance, low), high)
+                angle[0] = self.current_angle_deg % 360
+                self.batch_distance, self.batch_angle = distance, angle
+            else:
+                self.batch_distance = np.concatenate((self.batch_distance, distance))
+                self.batch_angle = np.concatenate((self.batch_angle, angle))
+        return self.batch_distance[:devices].copy(), self.batch_angle[:devices].copy()
+
+
+def reflect(values, low, high):
+    # Fold values into [low, high] as if they bounced on both bounds
+    span = high - low
+    if span <= 0:
+        return np.full_like(values, low)
+    folded = np.mod(values - low, 2 * span)
+    return low + np.where(folded > span, 2 * span - folded, folded)
 
 position_gen = PositionGenerator()
 
-def generate_random_ranging_data():
+def generate_random_ranging_data(generator=None):
     """
     Generate random ranging data that simulates real-world behavior.
     
+    Args:
+        generator: PositionGenerator of the simulated device, the shared position_gen when None
+    
     Returns:
         dict: A dictionary with randomized ranging data
     """
     
-    global position_gen
+    if generator is None:
+        generator = position_gen
 
-    distance,  angle = position_gen.get_next_position()
+    distance,  angle = generator.get_next_position()
     
     # First path power depends on distance (closer = stronger signal)
     # Range from -80 dBm (far) to -30 dBm (close)
@@ -121,7 +209,7 @@ def generate_random_ranging_data():
     power = base_power - 20 * math.log10(distance_factor)  # Convert to dB scale
     
     # Add some random variation
-    power = power + random.uniform(-5, 5)
+    power = power + generator.rng.uniform(-5, 5)
     
     # Ensure power is within reasonable bounds
     power = max(-80, min(-30, power))
@@ -132,7 +220,36 @@ def generate_random_ranging_data():
         "Distance": round(distance,2)              # cm
     }
 
-def set_connection_status(vehicle_status, ble_status, uwb_status, door_states=None, ranging_data=None):
+def generate_ranging_batch(steps, devices=1, seed=None, generator=None):
+    """
+    Vectorized generate_random_ranging_data: steps samples for devices devices in one call.
+    
+    Args:
+        steps: Samples per device
+        devices: Number of devices
+        seed: Seed for reproducible batches (used when generator is None)
+        generator: PositionGenerator to start from
+    
+    Returns:
+        dict: "FirstPathPower", "AOA", "Distance" arrays of shape (devices, steps)
+    """
+    if generator is None:
+        generator = PositionGenerator(seed=seed)
+    
+    distance, angle = generator.generate_batch(steps, devices)
+    
+    # Same path-loss model as generate_random_ranging_data
+    power = -30 - 20 * np.log10((distance / 100) ** 2)
+    power += generator.np_rng.uniform(-5, 5, size=power.shape)
+    power = np.clip(power, -80, -30)
+    
+    return {
+        "FirstPathPower": np.round(power, 1),  # dbm
+        "AOA": np.round(angle, 2),              # degree
+        "Distance": np.round(distance, 2)       # cm
+    }
+
+def build_hpc_frame(vehicle_status, ble_status, uwb_status, door_states=None, ranging_data=None, device_id=0xFF):
     # Default door states
     door_data = {
         "FrontLeft": ["close", "lock"],
@@ -159,13 +276,154 @@ def set_connection_status(vehicle_status, ble_status, uwb_status, door_states=No
         "Door": door_data,
         # User model
         "Ranging": ranging_data,
-        "Device_ID" : 0xFF # 0xFF : Unknown, ...
+        "Device_ID" : device_id # 0xFF : Unknown, ...
     }
-    response = requests.post(SERVER_URL, json=hpc_data_dict)
+    return hpc_data_dict
+
+def encode_hpc_frame(hpc_data_dict, timestamp=0.0):
+    """
+    Binary hpc_data_dict for POST with Content-Type FRAME_CONTENT_TYPE (28 bytes instead of ~400 of JSON).
+    Statuses become enum codes, doors a 10-bit mask, ranging float32, see api/frame_codec.py
+
+    Args:
+        timestamp: HPC sample time in secs, 0 lets the server use the arrival time
+    """
+    return encode_frame(hpc_data_dict, timestamp)
+
+def set_connection_status(vehicle_status, ble_status, uwb_status, door_states=None, ranging_data=None, binary=False):
+    hpc_data_dict = build_hpc_frame(vehicle_status, ble_status, uwb_status, door_states, ranging_data)
+    if binary:
+        response = requests.post(SERVER_URL, data=encode_hpc_frame(hpc_data_dict),
+                                 headers={"Content-Type": FRAME_CONTENT_TYPE})
+    else:
+        response = requests.post(SERVER_URL, json=hpc_data_dict)
     if response.ok:
-        print('Status updated:', response.json())
+        if should_log("frame"):
+            logger.info("Status updated", extra=log_fields("frame", echo=response.text))
     else:
-        print('Failed to update status:', response.status_code, response.text)
+        logger.warning("Failed to update status", extra=log_fields(status=response.status_code, body=response.text))
+
+class KeepAliveConnection:
+    """
+    Minimal HTTP/1.1 client on asyncio streams, the socket is reused between requests.
+    Reconnects when the server closes the connection (e.g. the HTTP/1.0 dev server).
+    """
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def post_json(self, path, body):
+        return await self.post(path, json.dumps(body).encode(), "application/json")
+
+    async def post(self, path, payload, content_type):
+        request = (f"POST {path} HTTP/1.1\r\n"
+                   f"Host: {self.host}:{self.port}\r\n"
+                   f"Content-Type: {content_type}\r\n"
+                   f"Content-Length: {len(payload)}\r\n"
+                   "Connection: keep-alive\r\n\r\n").encode() + payload
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.writer.write(request)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("Connection closed by server")
+            version, status = status_line.split()[:2]
+            headers = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip().lower()
+            connection = headers.get("connection")
+            keep_alive = connection == "keep-alive" or (version == b"HTTP/1.1" and connection != "close")
+            if int(status) in (204, 304):
+                pass
+            elif "content-length" in headers:
+                await self.reader.readexactly(int(headers["content-length"]))
+            else:
+                # Body ends when the server closes the connection
+                await self.reader.read()
+                keep_alive = False
+            if not keep_alive:
+                self.close()
+            return int(status)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def simulate_device(device_id, url, pool, interval, deadline, latencies, counters, binary=False):
+    # One device: its own PositionGenerator, one frame every interval secs
+    generator = PositionGenerator()
+    next_send = time.perf_counter() + random.uniform(0, interval)
+    while next_send < deadline:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        next_send += interval
+
+        frame = build_hpc_frame("Awake", "Connected", "Ranging", ranging_data=generate_random_ranging_data(generator), device_id=device_id)
+        connection = await pool.get()
+        start = time.perf_counter()
+        try:
+            if binary:
+                status = await connection.post(url.path or "/", encode_hpc_frame(frame), FRAME_CONTENT_TYPE)
+            else:
+                status = await connection.post_json(url.path or "/", frame)
+            latencies.append(time.perf_counter() - start)
+            counters["ok" if 200 <= status < 300 else "failed"] += 1
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            counters["errors"] += 1
+        finally:
+            pool.put_nowait(connection)
+
+async def run_load(server_url, devices, rate, duration, connections, binary=False):
+    """
+    Simulate N devices sending ranging frames at a total target rate.
+
+    Args:
+        server_url: HPC POST url, e.g. http://127.0.0.1/api/
+        devices: Number of simulated devices (Device_ID 0..devices-1)
+        rate: Target frames/s, all devices together
+        duration: Secs
+        connections: Size of the keep-alive connection pool
+        binary: Send binary frames (encode_hpc_frame) instead of JSON
+    
+    Returns:
+        dict: Achieved throughput and latency percentiles
+    """
+    url = urlsplit(server_url)
+    pool = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(KeepAliveConnection(url.hostname, url.port or 80))
+
+    latencies = []
+    counters = {"ok": 0, "failed": 0, "errors": 0}
+    interval = devices / rate
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(simulate_device(device_id, url, pool, interval, deadline, latencies, counters, binary)
+                           for device_id in range(devices)))
+    elapsed = time.perf_counter() - start
+    while not pool.empty():
+        pool.get_nowait().close()
+
+    report = dict(counters, devices=devices, target_rate=rate, elapsed=elapsed,
+                  throughput=(counters["ok"] + counters["failed"]) / elapsed)
+    if latencies:
+        p50, p99 = np.percentile(latencies, [50, 99])
+        report.update(latency_p50_ms=p50 * 1000, latency_p99_ms=p99 * 1000)
+    return report
 
 def set_door_status(door_command, current_door_states=None):
     """
@@ -241,6 +499,25 @@ def set_door_status(door_command, current_door_states=None):
     return True, door_states, f"Updated {door} state to {door_state[0]}, {door_state[1]}"
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HPC simulator, interactive when started without --load")
+    parser.add_argument("--load", action="store_true", help="Run the asyncio load generator instead of the interactive prompt")
+    parser.add_argument("--url", default=SERVER_URL, help="Server HPC POST url")
+    parser.add_argument("--devices", type=int, default=10, help="Simulated devices")
+    parser.add_argument("--rate", type=float, default=1000, help="Target frames/s, all devices together")
+    parser.add_argument("--duration", type=float, default=10, help="Load duration in secs")
+    parser.add_argument("--connections", type=int, default=16, help="Keep-alive connection pool size")
+    parser.add_argument("--binary", action="store_true", help="Send binary frames (application/x-hpc-frame) instead of JSON")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.load:
+        report = asyncio.run(run_load(args.url, args.devices, args.rate, args.duration, args.connections, args.binary))
+        print(f"Sent {report['ok'] + report['failed']} frames from {report['devices']} devices in {report['elapsed']:.2f} secs")
+        print(f"Throughput: {report['throughput']:.1f} frames/s (target {report['target_rate']:.0f}), failed: {report['failed']}, errors: {report['errors']}")
+        if "latency_p50_ms" in report:
+            print(f"Ingest latency: p50 {report['latency_p50_ms']:.2f} ms, p99 {report['latency_p99_ms']:.2f} ms")
+        raise SystemExit(0)
+
     # Initialize default values
     vehicle_status = 'Sleep'
     ble_status = 'Disconnected'
@@ -338,7 +615,8 @@ if __name__ == "__main__":
                     "FirstPathPower": 0,  # dbm
                     "AOA": 0,              # degree
                     "Distance": 0             # cm
-                }
+                },
+                binary=args.binary
             );
             break
             
@@ -352,8 +630,12 @@ if __name__ == "__main__":
                       # Send the updated door state to the server with random ranging data
                 try:
                     # ranging_data = generate_random_ranging_data()
-                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data)
-                    print(f"Door status sent to server with ranging data: Distance={ranging_data['Distance']}cm, Angle={ranging_data['AOA']}°, Power={ranging_data['FirstPathPower']}dBm")
+                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data, binary=args.binary)
+                    if ranging_data is None:
+                        # Sent with "Ranging": null, the server keeps the last user position
+                        print("Door status sent to server without ranging data")
+                    else:
+                        print(f"Door status sent to server with ranging data: Distance={ranging_data['Distance']}cm, Angle={ranging_data['AOA']}°, Power={ranging_data['FirstPathPower']}dBm")
                 except Exception as e:
                     print(f"Error sending door status to server: {str(e)}")
             else:
@@ -376,7 +658,7 @@ if __name__ == "__main__":
             if need_to_update_server:
                 try:
                     ranging_data = generate_random_ranging_data()
-                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data)
+                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data, binary=args.binary)
                     print(f"Connection status sent to server with ranging data: Distance={ranging_data['Distance']}cm, Angle={ranging_data['AOA']}°, Power={ranging_data['FirstPathPower']}dBm")
                     need_to_update_server = False
                 except Exception as e:
@@ -386,8 +668,9 @@ if __name__ == "__main__":
             while(True):
                 try:
                     ranging_data = generate_random_ranging_data()
-                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data)
-                    print(f"Connection status sent to server with ranging data: Distance={ranging_data['Distance']}cm, Angle={ranging_data['AOA']}°, Power={ranging_data['FirstPathPower']}dBm")
+                    set_connection_status(last_vehicle_status, last_ble_status, last_uwb_status, last_door_states, ranging_data, binary=args.binary)
+                    if should_log("frame"):
+                        logger.info("Connection status sent", extra=log_fields("frame", **ranging_data))
                     need_to_update_server = False
                     time.sleep((288 + 20) / 1000)
                 except KeyboardInterrupt as e:
@@ -3,10 +3,10 @@
  * Manages BLE connection status display and animations in the panel
  */
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 // Constants
 const CONFIG = {
-    POLL_INTERVAL: 576,
     ANIMATION_FPS: 60,
     PULSE_SPEED: 1.5,
     PULSE_AMPLITUDE: 0.1,
@@ -61,7 +61,7 @@ class BLEIconPanelManager {
     delayedInit() {
         setTimeout(() => {
             this.init();
-            this.startConnectionPolling();
+            this.subscribeConnection();
         }, CONFIG.INIT_DELAY);
     }
     
@@ -207,24 +207,9 @@ class BLEIconPanelManager {
         animate();
     }
     
-    startConnectionPolling() {
-        const poll = async () => {
-            try {
-                const response = await fetch('/api/connection');
-                if (!response.ok) return;
-                
-                const data = await response.json();
-                this.updateConnectionState(data.BleStatus);
-            } catch (error) {
-                if (error instanceof TypeError && error.message.includes("Failed to fetch")) {
-                    return; // Server unavailable - silent fail
-                }
-            }
-        };
-        
-        poll();
-        setInterval(poll, CONFIG.POLL_INTERVAL);
-        
+    subscribeConnection() {
+        // Server pushes connection status only when it changes
+        subscribe('Connection', data => this.updateConnectionState(data.BleStatus));
     }
     
     updateConnectionState(bleStatus) {
@@ -5,6 +5,7 @@
  */
 import { CarModel } from './car.js';
 import * as THREE from 'three';
+import { subscribe } from './feed.js';
 
 // -----------------------------------------
 // Constants and Variables
@@ -433,24 +434,17 @@ function hideCircle(CircleObj, CircleMaxRadius, CircleMinRadius) {
     });
 }
 
-// Function to fetch door status from server
-async function fetchConnectionStatus() {
+// Function to apply connection status pushed by the server
+function onConnectionStatus(connectionData) {
     try {
-        const response = await fetch('/api/connection');
-        if (!response.ok) {
-            throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        
-        const connectionData = await response.json();
         updateConnectionUI(connectionData);
-        return connectionData; // Return the data for promise chaining
+        return connectionData;
     } catch (error) {
-        if (error instanceof TypeError && error.message.includes("Failed to fetch")) return null;
-        console.error("Error fetching connection status:", error);
+        console.error("Error updating connection status:", error);
         return null;
     }
 }
 
-// Poll the server for connection status updates (once per second is sufficient for door status)
-setInterval(fetchConnectionStatus, ( 288 * 2 ) );
+// Server pushes connection status only when it changes
+subscribe('Connection', onConnectionStatus);
 
@@ -31,6 +31,7 @@ function getDoorLockColor(lockStatus) {
 
 // Import dataPanel from panel.js
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 // Update door models based on door states from the server
 function updateDoorStatus(doorStates) {
@@ -72,19 +73,12 @@ function updateDoorStatus(doorStates) {
     }
 }
 
-// Function to fetch door status from server
-async function fetchDoorStatus() {
+// Function to apply door status pushed by the server
+function onDoorStatus(doorData) {
     try {
-        const response = await fetch('/api/door');
-        if (!response.ok) {
-            throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        
-        const doorData = await response.json();
         updateDoorStatus(doorData);
     } catch (error) {
-        if (error instanceof TypeError && error.message.includes("Failed to fetch")) return;
-        console.error("Error fetching door status:", error);
+        console.error("Error updating door status:", error);
     }
 }
 
@@ -241,5 +235,5 @@ function animateDoorColor(doorModel, color) {
     });
 }
 
-// Poll the server for door status updates (once per second is sufficient for door status)
-setInterval(fetchDoorStatus, ( 288 * 2 ) );
+// Server pushes door status only when it changes
+subscribe('Door', onDoorStatus);
@@ -0,0 +1,127 @@
+/**
+ * Compact State Feed Client
+ * Shares one EventSource (/api/feed) between every module of the page: subscribe(topic, callback)
+ * calls back with the Connection / Door / Ranging / User section whenever it changes.
+ * The server sends one keyframe, then only the fields that changed (see api/feed.py):
+ * statuses arrive as enum codes and doors as a bitmask, they are decoded back into the
+ * Connection / Door / Ranging / User objects the modules already use.
+ */
+
+const UNKNOWN_STATUS = 'Unknown';
+
+// Field -> section it belongs to, Device_ID is not a section
+const SECTION_OF_FIELD = {
+    VehicleStatus: 'Connection',
+    BleStatus: 'Connection',
+    UwbStatus: 'Connection',
+    Door: 'Door',
+    FirstPathPower: 'Ranging',
+    AOA: 'Ranging',
+    Distance: 'Ranging',
+    x: 'User',
+    y: 'User',
+    TurnAngle: 'User',
+};
+
+// topic -> [callback, ...]
+const listeners = {};
+// Decoding tables of the keyframe and the latest values, null until the keyframe arrives
+const feed = { layout: null, values: null };
+let source = null;
+
+export function decodeDoors(bits, doors) {
+    // Bit 2*i: doors[i] open, bit 2*i+1: doors[i] unlock
+    const door = {};
+    doors.forEach((name, i) => {
+        door[name] = [
+            (bits >> (2 * i)) & 1 ? 'open' : 'close',
+            (bits >> (2 * i + 1)) & 1 ? 'unlock' : 'lock',
+        ];
+    });
+    return door;
+}
+
+export function decodeSection(state, section) {
+    const { layout, values } = state;
+    const value = field => values[layout.fields.indexOf(field)];
+    const status = field => layout.enums[field][value(field)] ?? UNKNOWN_STATUS;
+
+    switch (section) {
+        case 'Connection':
+            return {
+                VehicleStatus: status('VehicleStatus'),
+                BleStatus: status('BleStatus'),
+                UwbStatus: status('UwbStatus'),
+            };
+        case 'Door':
+            return decodeDoors(value('Door'), layout.doors);
+        case 'Ranging':
+            return {
+                FirstPathPower: value('FirstPathPower'),
+                AOA: value('AOA'),
+                Distance: value('Distance'),
+            };
+        case 'User':
+            return { x: value('x'), y: value('y'), TurnAngle: value('TurnAngle') };
+        default:
+            throw new Error(`Unknown section ${section}`);
+    }
+}
+
+export function applyFeedMessage(state, message) {
+    // Returns the sections that changed, every section for a keyframe
+    if (message.k) {
+        state.layout = message.k;
+        state.values = message.s.slice();
+        return ['Connection', 'Door', 'Ranging', 'User'];
+    }
+    if (!state.values) {
+        // Delta before any keyframe cannot be decoded
+        return [];
+    }
+    const changed = new Set();
+    for (let i = 0; i < message.d.length; i += 2) {
+        const index = message.d[i];
+        state.values[index] = message.d[i + 1];
+        const section = SECTION_OF_FIELD[state.layout.fields[index]];
+        if (section) {
+            changed.add(section);
+        }
+    }
+    return [...changed];
+}
+
+function openSource() {
+    // EventSource reconnects by itself, the server starts every connection with a keyframe
+    source = new EventSource('/api/feed');
+    source.onmessage = event => {
+        let message;
+        try {
+            message = JSON.parse(event.data);
+        } catch (error) {
+            console.error('[Feed] Invalid frame:', error);
+            return;
+        }
+        applyFeedMessage(feed, message).forEach(section => {
+            const callbacks = listeners[section];
+            if (callbacks && callbacks.length) {
+                const data = decodeSection(feed, section);
+                callbacks.forEach(callback => callback(data));
+            }
+        });
+    };
+}
+
+export function subscribe(topic, callback) {
+    if (!(topic in listeners)) {
+        listeners[topic] = [];
+    }
+    listeners[topic].push(callback);
+
+    if (!source) {
+        openSource();
+    } else if (feed.values) {
+        // Late subscriber: hand over the current state instead of waiting for the next change
+        callback(decodeSection(feed, topic));
+    }
+}
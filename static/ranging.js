@@ -1,19 +1,14 @@
 // Ranging data management
 import { dataPanel } from './panel.js';
 import { UserModel } from './user.js';
+import { subscribe } from './feed.js';
 
 // Keep track of previous ranging data to detect changes
 let previousRangingData = null;
 
-// Function to fetch ranging data from server
-async function fetchRangingStatus() {
+// Function to apply ranging data pushed by the server
+function updateRangingStatus(rangingData) {
     try {
-        const response = await fetch('/api/ranging');
-        if (!response.ok) {
-            throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        
-        const rangingData = await response.json();
         UserModel.firstPathPower = rangingData["FirstPathPower"]
         UserModel.trueDistance = rangingData["Distance"]
         
@@ -36,12 +31,11 @@ async function fetchRangingStatus() {
         previousRangingData = {...rangingData};
         return rangingData; // Return the data for promise chaining
     } catch (error) {
-        if (error instanceof TypeError && error.message.includes("Failed to fetch")) return null;
-        console.error("Error fetching ranging status:", error);
+        console.error("Error updating ranging status:", error);
         return null;
     }
 }
 
 
-// Poll the server for ranging status updates
-setInterval(fetchRangingStatus, ( 288 ) );
+// Server pushes ranging data only when it changes
+subscribe('Ranging', updateRangingStatus);
@@ -3,6 +3,30 @@ import { OrbitControls } from 'three/addons/controls/OrbitControls.js';
 import { GLTFLoader } from 'three/addons/loaders/GLTFLoader.js';
 import { DRACOLoader } from 'three/addons/loaders/DRACOLoader.js';
 
+// Decoders of the compressed GLBs (python -m api.glb optimize), served from this server, not a CDN.
+// python -m api.glb vendor copies them from the three package to static/vendor/.
+const DRACO_DECODER_PATH = '/static/vendor/draco/';
+const MESHOPT_DECODER_URL = '/static/vendor/meshopt_decoder.module.js';
+
+// GLTFLoader only touches ready / decodeGltfBuffer for a model that uses EXT_meshopt_compression:
+// the decoder module is imported then, pages with uncompressed or Draco models never request it.
+// DRACOLoader is lazy the same way, it fetches its decoder on the first Draco model.
+const lazyMeshoptDecoder = {
+    supported: true,
+    decoder: null,
+    loading: null,
+    get ready() {
+        this.loading ??= import(MESHOPT_DECODER_URL).then(async ({ MeshoptDecoder }) => {
+            await MeshoptDecoder.ready;
+            this.decoder = MeshoptDecoder;
+        });
+        return this.loading;
+    },
+    decodeGltfBuffer(...args) {
+        return this.decoder.decodeGltfBuffer(...args);
+    },
+};
+
 /**
  * Shared Scene Manager
  * Handles the common THREE.js elements like scene, renderer, camera, and controls
@@ -99,14 +123,18 @@ class SceneManager {
     }
     
     /**
-     * Create a GLTF loader with DRACO decompression support
+     * Create a GLTF loader with DRACO and Meshopt decompression support
      * @returns {GLTFLoader} - Configured GLTF loader
      */
     createGLTFLoader() {
         const loader = new GLTFLoader();
-        const dracoLoader = new DRACOLoader();
-        dracoLoader.setDecoderPath('https://cdn.jsdelivr.net/npm/three@0.159.0/examples/jsm/libs/draco/');
-        loader.setDRACOLoader(dracoLoader);
+        if (!this.dracoLoader) {
+            // One decoder (and worker pool) for every model
+            this.dracoLoader = new DRACOLoader();
+            this.dracoLoader.setDecoderPath(DRACO_DECODER_PATH);
+        }
+        loader.setDRACOLoader(this.dracoLoader);
+        loader.setMeshoptDecoder(lazyMeshoptDecoder);
         return loader;
     }
 }
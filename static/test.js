@@ -147,6 +147,7 @@
 import * as THREE from 'three';
 import { gSceneManager } from './scene.js';
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 console.log("========================================");
 console.log("[BLE Icon] Module loading...");
@@ -184,7 +185,7 @@ class BLEIconManager {
             this.createSignalRings();
             this.setFixedPosition();
             this.startAnimationLoop(); // Start loop but animations inactive
-            this.startConnectionPolling(); // Start polling BLE status
+            this.subscribeConnection(); // BLE status is pushed on change
         }, 1000);
     }
     
@@ -438,33 +439,11 @@ class BLEIconManager {
     
     // ===== CONNECTION HANDLING =====
     
-    startConnectionPolling() {
-        // Poll BLE connection status every 576ms (288 * 2)
-        setInterval(() => {
-            this.fetchBLEConnectionStatus();
-        }, 576);
-        
-        console.log("[BLE Icon] 🔄 Started polling BLE connection status (576ms interval)");
-    }
-    
-    async fetchBLEConnectionStatus() {
-        try {
-            const response = await fetch('/api/connection');
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            
-            const connectionData = await response.json();
-            const bleStatus = connectionData.BleStatus; // "Connected" or "Disconnected"
-            
-            this.updateConnectionState(bleStatus);
-            
-        } catch (error) {
-            if (error instanceof TypeError && error.message.includes("Failed to fetch")) {
-                return; // Server not available, silent fail
-            }
-            console.error("[BLE Icon] Error fetching connection status:", error);
-        }
+    subscribeConnection() {
+        // Server pushes connection status only when it changes
+        subscribe('Connection', connectionData => this.updateConnectionState(connectionData.BleStatus));
+
+        console.log("[BLE Icon] 🔄 Subscribed to BLE connection status stream");
     }
     
     updateConnectionState(bleStatus) {
@@ -677,4 +656,4 @@ document.addEventListener('keydown', (event) => {
 
 console.log("[BLE Icon] ✅ BLE Icon initialized (default: static/disconnected)");
 console.log("[BLE Icon] 🎮 Controls: B=Pulse | N=Rotate | M=Float | K=Waves | C=Force Connect | X=Force Disconnect");
-console.log("[BLE Icon] 📡 Polling /api/connection every 576ms for BLE status");
\ No newline at end of file
+console.log("[BLE Icon] 📡 BLE status pushed by /api/feed on change");
\ No newline at end of file
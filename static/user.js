@@ -2,6 +2,7 @@
 import * as THREE from 'three';
 import { gSceneManager } from './scene.js';
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 /**
  * UserModelManager class
@@ -627,15 +628,8 @@ class UserModelManager {
 // Create and export a single instance
 export const UserModel = new UserModelManager();
 let previousUserData = null;
-async function fetchUserStatus() {
+function updateUserStatus(userData) {
     try {
-        const response = await fetch('/api/user');
-        if (!response.ok) {
-            throw new Error(`HTTP error! Status: ${response.status}`);
-        }
-        
-        const userData = await response.json();
-        
         // Update the user model with the fetched data
         UserModel.updateFromUserPositionData(userData);
         if(previousUserData)
@@ -651,11 +645,10 @@ async function fetchUserStatus() {
         previousUserData = {...userData};
         return userData; // Return the data for promise chaining
     } catch (error) {
-        if (error instanceof TypeError && error.message.includes("Failed to fetch")) return null;
-        console.error("Error fetching user status:", error);
+        console.error("Error updating user status:", error);
         return null;
     }
 }
 
-// Poll the server for user data updates
-setInterval(fetchUserStatus, ( 288 ) );
+// Server pushes user data only when it changes
+subscribe('User', updateUserStatus);
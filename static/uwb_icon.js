@@ -2,6 +2,7 @@
 import * as THREE from 'three';
 import { gSceneManager } from './scene.js';
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 console.log("========================================");
 console.log("[UWB Icon] Module loading...");
@@ -40,7 +41,7 @@ class UWBIconManager {
             this.createSignalRings();
             this.setFixedPosition();
             this.startAnimationLoop();
-            this.startConnectionPolling();
+            this.subscribeConnection();
         }, 1000);
     }
     
@@ -294,32 +295,11 @@ class UWBIconManager {
     
     // ===== CONNECTION HANDLING =====
     
-    startConnectionPolling() {
-        setInterval(() => {
-            this.fetchUWBConnectionStatus();
-        }, 576);
-        
-        console.log("[UWB Icon] 🔄 Started polling UWB connection status (576ms interval)");
-    }
-    
-    async fetchUWBConnectionStatus() {
-        try {
-            const response = await fetch('/api/connection');
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            
-            const connectionData = await response.json();
-            const uwbStatus = connectionData.UwbStatus; // "NA", "Ranging", "CPD", "Mixed"
-            
-            this.updateConnectionState(uwbStatus);
-            
-        } catch (error) {
-            if (error instanceof TypeError && error.message.includes("Failed to fetch")) {
-                return;
-            }
-            console.error("[UWB Icon] Error fetching connection status:", error);
-        }
+    subscribeConnection() {
+        // Server pushes connection status only when it changes
+        subscribe('Connection', connectionData => this.updateConnectionState(connectionData.UwbStatus));
+
+        console.log("[UWB Icon] 🔄 Subscribed to UWB connection status stream");
     }
     
     updateConnectionState(uwbStatus) {
@@ -544,5 +524,5 @@ document.addEventListener('keydown', (event) => {
 
 console.log("[UWB Icon] ✅ UWB Icon initialized (default: static/not ranging)");
 console.log("[UWB Icon] 🎮 Controls: U=Pulse | I=Rotate | O=Float | P=Waves | R=Force Ranging | T=Force Not Ranging");
-console.log("[UWB Icon] 📡 Polling /api/connection every 576ms for UWB status");
+console.log("[UWB Icon] 📡 UWB status pushed by /api/feed on change");
 console.log("[UWB Icon] 📍 Position: Left side (-1.0, 3.5, 1.0)");
\ No newline at end of file
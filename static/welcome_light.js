@@ -1,6 +1,7 @@
 import * as THREE from 'three';
 import { gSceneManager } from './scene.js';
 import { dataPanel } from './panel.js';
+import { subscribe } from './feed.js';
 
 
 /**
@@ -52,9 +53,9 @@ class WelcomeLightManager {
         this.lightTexture = this.createLightTexture();
         this.createLightProjections();
 
-        // Start polling connection status
+        // Connection status is pushed on change
         setTimeout(() => {
-            this.startConnectionPolling();
+            this.subscribeConnection();
         }, 1000);
     }
 
@@ -169,28 +170,9 @@ class WelcomeLightManager {
 
     // ===== CONNECTION STATUS MONITORING =====
 
-    startConnectionPolling() {
-        setInterval(() => {
-            this.fetchConnectionStatus();
-        }, 576);
-        
-    }
-
-    async fetchConnectionStatus() {
-        try {
-            const response = await fetch('/api/connection');
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            
-            const connectionData = await response.json();
-            this.updateConnectionState(connectionData);
-            
-        } catch (error) {
-            if (error instanceof TypeError && error.message.includes("Failed to fetch")) {
-                return;
-            }
-        }
+    subscribeConnection() {
+        // Server pushes connection status only when it changes
+        subscribe('Connection', connectionData => this.updateConnectionState(connectionData));
     }
 
     updateConnectionState(connectionData) {
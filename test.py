@@ -1,64 +1,12 @@
 import requests
-import random
 import math
-import numpy as np
 import time
 
+from client_set_connection import PositionGenerator
+
 SERVER_URL = 'http://127.0.0.1/api'
 # SERVER_URL = 'http://10.102.50.15/api'
 
-
-class PositionGenerator:
-    def __init__(self, rect_corners=((-1.5, 2.5), (1.5, -2.5)), max_radius=10):
-        """
-        Initialize the position generator.
-        Args:
-            rect_corners: Tuple of diagonal corners ((x1, y1), (x2, y2))
-            max_radius: Maximum distance from rectangle center
-        """
-        (x1, y1), (x2, y2) = rect_corners
-        self.x_min, self.x_max = min(x1, x2), max(x1, x2)
-        self.y_min, self.y_max = min(y1, y2), max(y1, y2)
-
-        self.center_x = (self.x_min + self.x_max) / 2
-        self.center_y = (self.y_min + self.y_max) / 2
-        self.width = self.x_max - self.x_min
-        self.height = self.y_max - self.y_min
-        self.half_diagonal = math.sqrt((self.width / 2) ** 2 + (self.height / 2) ** 2)
-        self.max_radius = max_radius
-
-        initial_angle = 60
-        initial_distance = 200
-
-        self.current_distance = initial_distance
-        self.current_angle_rad = initial_angle
-        self.current_angle_deg = math.degrees(initial_angle)
-
-        self.distance_step_range = (0.25, 0.5)
-        self.angle_step_range = (0.1, 6)
-
-    def get_next_position(self):
-        distance_direction = random.choice([-1, 1])
-        angle_direction = 1
-        distance_step = random.uniform(*self.distance_step_range)
-        angle_step = random.uniform(*self.angle_step_range)
-        new_distance = self.current_distance + (distance_direction * distance_step)
-        new_distance = max(self.half_diagonal, min(new_distance, self.max_radius))
-        new_angle_deg = self.current_angle_deg + (angle_direction * angle_step)
-        new_angle_deg = new_angle_deg % 360
-        new_angle_rad = math.radians(new_angle_deg)
-        new_x = self.center_x + new_distance * math.cos(new_angle_rad)
-        new_y = self.center_y + new_distance * math.sin(new_angle_rad)
-
-        if self.x_min <= new_x <= self.x_max and self.y_min <= new_y <= self.y_max:
-            return self.get_next_position()
-
-        self.current_distance = new_distance
-        self.current_angle_rad = new_angle_rad
-        self.current_angle_deg = new_angle_deg
-        return [self.current_distance * 100, self.current_angle_deg]
-
-
 position_gen = PositionGenerator()
 
 
@@ -68,7 +16,7 @@ def generate_random_ranging_data():
     base_power = -30
     distance_factor = (distance / 100) ** 2
     power = base_power - 20 * math.log10(distance_factor)
-    power = power + random.uniform(-5, 5)
+    power = power + position_gen.rng.uniform(-5, 5)
     power = max(-80, min(-30, power))
     return {
         "FirstPathPower": round(power, 1),